@@ -1,9 +1,11 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from io import BytesIO
+import perf
 import utils
+import cache
+
+# Modul berat (matplotlib lewat charts, scipy lewat optimizer) dan modul fitur lain diimpor
+# di tempat dipakai, sehingga start sesi hanya membayar streamlit + inti perhitungan.
 
 # ====================== KONFIGURASI HALAMAN ======================
 st.set_page_config(
@@ -13,6 +15,39 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentasi (panel Performance di bawah) dimulai sebelum konten lain agar seluruh run tercatat.
+# Run sebelumnya yang berhenti karena exception tidak sampai ke perf.stop(), jadi sisa trace dan
+# tracemalloc-nya dibersihkan di sini, juga saat instrumentasi dimatikan.
+if st.session_state.get('perf_on'):
+    perf.start('app', memory=st.session_state.get('perf_memory', False),
+               profile=st.session_state.get('perf_profile', False))
+else:
+    perf.reset()
+perf_downloads = st.session_state.setdefault('perf_downloads', [])
+
+
+def perf_traced(func, name):
+    # Data download dibuat saat tombol diklik; dengan instrumentasi aktif, rekam sebagai trace sendiri
+    if not st.session_state.get('perf_on'):
+        return func
+    return perf.traced(func, name, perf_downloads, memory=st.session_state.get('perf_memory', False))
+
+
+# Urutan sama dengan charts.CHART_BUILDERS; disalin di sini agar matplotlib tidak dimuat hanya
+# untuk membuat tombol download
+CHART_NAMES = ['midpoints', 'spread', 'ranges', 'overlap']
+
+
+def chart_download(name, df, currency):
+    import charts
+    return charts.render_png(name, df, currency, dpi=charts.DOWNLOAD_DPI)
+
+
+def placed_roster_csv(roster, structure):
+    import export
+    import placement
+    return export.to_csv(placement.place(roster, structure))
+
 # ====================== CSS KUSTOM ======================
 st.markdown("""
 <style>
@@ -78,54 +113,31 @@ with st.sidebar:
         
     elif scenario == 5:
         st.subheader("📌 Additional Parameters")
-        target_percentile = st.selectbox("Target Percentile", [30, 40, 50, 60, 75, 90], index=0)
-        additional_params = {'target_percentile': target_percentile}
+        survey_file = st.file_uploader("Market Survey (optional)", type=["xlsx", "csv", "parquet"],
+                                       help="One row per survey sample with columns 'Salary Grade' and 'Salary'")
+        market_data = None
+        if survey_file is not None:
+            try:
+                import market
+                market_data = market.load_survey(survey_file.getvalue(), survey_file.name)
+            except Exception as e:
+                st.error(f"❌ Survey error: {str(e)}")
+        if market_data is not None:
+            st.caption(f"Survey: {len(market_data.grades)} grades, {len(market_data.values):,} samples")
+            target_percentile = st.slider("Target Percentile", min_value=1, max_value=99, value=50)
+            additional_params = {'target_percentile': target_percentile, 'market_data': market_data}
+        else:
+            target_percentile = st.selectbox("Target Percentile", [30, 40, 50, 60, 75, 90], index=0)
+            additional_params = {'target_percentile': target_percentile}
     
     st.markdown("---")
     st.subheader("📁 Data Input")
     uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx", "xls"])
     
     if st.button("📥 Download Template Excel"):
-        if scenario == 1:
-            data = {
-                'Salary Grade': utils.DEFAULT_GRADE_NAMES[:num_grades],
-                'Minimum': [50000 + i*10000 for i in range(num_grades)],
-                'Maximum': [70000 + i*14000 for i in range(num_grades)]
-            }
-        elif scenario == 2:
-            data = {
-                'Salary Grade': utils.DEFAULT_GRADE_NAMES[:num_grades],
-                'Spread %': [30] * num_grades
-            }
-        elif scenario == 3:
-            data = {
-                'Salary Grade': utils.DEFAULT_GRADE_NAMES[:num_grades],
-                'Midpoint Differential %': [0] + [10] * (num_grades - 1),
-                'Spread %': [30] * num_grades
-            }
-        elif scenario == 4:
-            base = 50000
-            data = {
-                'Salary Grade': utils.DEFAULT_GRADE_NAMES[:num_grades],
-                'Midpoint': [base * (1.1 ** i) for i in range(num_grades)],
-                'Spread %': [30] * num_grades
-            }
-        elif scenario == 5:
-            base = 50000
-            data = {
-                'Salary Grade': utils.DEFAULT_GRADE_NAMES[:num_grades],
-                'Market Rate': [base * (1.1 ** i) for i in range(num_grades)],
-                'Spread %': [30] * num_grades
-            }
-        
-        df_template = pd.DataFrame(data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_template.to_excel(writer, index=False, sheet_name='Template')
-        
         st.download_button(
             label="Download Template",
-            data=output.getvalue(),
+            data=cache.template_excel(scenario, num_grades),
             file_name=f"template_scenario_{scenario}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -133,7 +145,8 @@ with st.sidebar:
     st.info("💡 **Tips:**\n1. Download template Excel\n2. Edit di Excel\n3. Upload kembali\n4. Calculate!")
 
 # ====================== MAIN CONTENT ======================
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Input Data", "📈 Results", "📉 Visualizations", "📥 Export"])
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(["📊 Input Data", "📈 Results", "📉 Visualizations", "📥 Export",
+                                                    "🔍 Sweep", "🎯 Optimize", "📅 Projection"])
 
 # Initialize session state
 if 'result_df' not in st.session_state:
@@ -145,10 +158,12 @@ with tab1:
     st.header("Input Data")
 
     if uploaded_file is not None:
-        if 'last_uploaded' not in st.session_state or st.session_state.last_uploaded != uploaded_file.name:
-            df = pd.read_excel(uploaded_file)
+        file_bytes = uploaded_file.getvalue()
+        file_hash = cache.hash_bytes(file_bytes)
+        if 'last_uploaded' not in st.session_state or st.session_state.last_uploaded != file_hash:
+            df = cache.read_excel(file_bytes)
             st.session_state.input_df = df
-            st.session_state.last_uploaded = uploaded_file.name
+            st.session_state.last_uploaded = file_hash
             st.success(f"✅ File loaded! ({len(df)} rows)")
         else:
             df = st.session_state.input_df.copy()
@@ -162,8 +177,8 @@ with tab1:
                 st.success("Changes saved!")
         with col2:
             if st.button("🔄 Reload Original", use_container_width=True):
-                st.session_state.input_df = pd.read_excel(uploaded_file)
-                st.session_state.last_uploaded = uploaded_file.name
+                st.session_state.input_df = cache.read_excel(file_bytes)
+                st.session_state.last_uploaded = file_hash
                 st.rerun()
     else:
         st.info("Please upload an Excel file or use template from sidebar.")
@@ -172,21 +187,26 @@ with tab2:
     st.header("Calculation Results")
     
     if st.button("🚀 Calculate Salary Structure", use_container_width=True):
+        validation_errors = None
+        if st.session_state.input_df is not None:
+            validation_errors = utils.validate(st.session_state.input_df, scenario, additional_params)
         if st.session_state.input_df is None:
             st.error("❌ Please load or input data first!")
+        elif len(validation_errors):
+            st.error(f"❌ Input data has {len(validation_errors)} validation error(s)")
+            st.dataframe(validation_errors, use_container_width=True, hide_index=True)
         else:
             with st.spinner("Calculating..."):
                 try:
-                    if scenario == 1:
-                        result = utils.calculate_scenario_1(st.session_state.input_df)
-                    elif scenario == 2:
-                        result = utils.calculate_scenario_2(st.session_state.input_df, **additional_params)
-                    elif scenario == 3:
-                        result = utils.calculate_scenario_3(st.session_state.input_df, **additional_params)
-                    elif scenario == 4:
-                        result = utils.calculate_scenario_4(st.session_state.input_df)
-                    elif scenario == 5:
-                        result = utils.calculate_scenario_5(st.session_state.input_df, **additional_params)
+                    # Jika hanya beberapa sel yang diedit sejak perhitungan terakhir, hitung ulang inkremental
+                    last = st.session_state.get('last_calc')
+                    if last is not None and last['scenario'] == scenario and last['params'] == additional_params:
+                        result = utils.recalculate(last['result'], st.session_state.input_df, scenario,
+                                                   previous_input=last['input'], **additional_params)
+                    else:
+                        result = cache.calculate(st.session_state.input_df, scenario, additional_params)
+                    st.session_state.last_calc = {'scenario': scenario, 'params': dict(additional_params),
+                                                  'input': st.session_state.input_df, 'result': result}
                     
                     st.session_state.result_df = result
                     st.success("✅ Calculation complete!")
@@ -232,7 +252,7 @@ with tab2:
         
         with col_reset_b:
             if st.button("🗑️ Clear All", use_container_width=True):
-                for key in ['result_df', 'input_df', 'last_uploaded']:
+                for key in ['result_df', 'input_df', 'last_uploaded', 'last_calc', 'optimized_df']:
                     if key in st.session_state:
                         del st.session_state[key]
                 st.rerun()
@@ -243,120 +263,60 @@ with tab3:
     if st.session_state.result_df is not None:
         df = st.session_state.result_df
         
-        # Buat 4 visualisasi
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # 1. SALARY MIDPOINTS & PROGRESSION
-            st.subheader("SALARY MIDPOINTS & PROGRESSION")
-            fig1, ax1 = plt.subplots(figsize=(10, 6))
-            
-            grades = df['Salary Grade']
-            midpoints = df['Midpoint']
-            ax1.plot(grades, midpoints, color='gold', marker='o', linewidth=3, markersize=8, label='Midpoint')
-            
-            if 'Mid Point Differential %' in df.columns:
-                ax2 = ax1.twinx()
-                diff_pct = df['Mid Point Differential %']
-                ax2.scatter(grades, diff_pct, color='green', s=150, alpha=0.7, label='Midpoint Differential %')
-                ax2.set_ylabel('Midpoint Differential (%)', color='green')
-                ax2.tick_params(axis='y', labelcolor='green')
-                
-                for i, (grade, diff) in enumerate(zip(grades, diff_pct)):
-                    ax2.text(i, diff, f'{diff:.1f}%', ha='center', va='bottom', fontsize=8, color='darkgreen')
-            
-            ax1.set_xlabel('Grade')
-            ax1.set_ylabel(f'Salary ({currency})', color='darkgoldenrod')
-            ax1.tick_params(axis='x', rotation=45)
-            ax1.grid(True, alpha=0.3, linestyle='--')
-            
-            for i, (grade, mp) in enumerate(zip(grades, midpoints)):
-                ax1.text(i, mp, f'{currency}{mp:,.0f}', ha='center', va='bottom', fontsize=8, color='darkgoldenrod')
-            
-            st.pyplot(fig1)
-            
-            # 3. SALARY RANGES BY GRADE
-            st.subheader("SALARY RANGES BY GRADE")
-            fig3, ax3 = plt.subplots(figsize=(10, 8))
-            
-            y_pos = range(len(grades))
-            for i, (grade, min_val, max_val) in enumerate(zip(grades, df['Minimum'], df['Maximum'])):
-                ax3.barh(i, max_val - min_val, left=min_val, height=0.6, color='gold', alpha=0.8, edgecolor='darkgoldenrod')
-                ax3.text(min_val, i, f'{currency}{min_val:,.0f}', ha='right', va='center', fontsize=8)
-                ax3.text(max_val, i, f'{currency}{max_val:,.0f}', ha='left', va='center', fontsize=8)
-            
-            ax3.set_yticks(y_pos)
-            ax3.set_yticklabels(grades)
-            ax3.set_xlabel(f'Salary ({currency})')
-            ax3.invert_yaxis()
-            ax3.grid(True, alpha=0.3, linestyle='--', axis='x')
-            
-            st.pyplot(fig3)
-        
-        with col2:
-            # 2. SALARY GRADES - SPREAD
-            st.subheader("SALARY GRADES - SPREAD")
-            fig2, ax2 = plt.subplots(figsize=(10, 6))
-            
-            y_pos = range(len(grades))
-            ranges = df['Maximum'] - df['Minimum']
-            
-            ax2.barh(y_pos, ranges, left=df['Minimum'], color='gold', alpha=0.8, height=0.6, edgecolor='darkgoldenrod')
-            
-            if 'Spread %' in df.columns:
-                spread_positions = df['Minimum'] + (ranges / 2)
-                scatter = ax2.scatter(spread_positions, y_pos, s=150, color='green', alpha=0.7, label='Spread %')
-                for i, (pos, spread) in enumerate(zip(spread_positions, df['Spread %'])):
-                    ax2.text(pos, i, f'{spread:.1f}%', ha='center', va='center', fontsize=8, color='white')
-            
-            ax2.set_yticks(y_pos)
-            ax2.set_yticklabels(grades)
-            ax2.set_xlabel(f'Salary ({currency})')
-            ax2.invert_yaxis()
-            ax2.grid(True, alpha=0.3, linestyle='--', axis='x')
-            
-            st.pyplot(fig2)
-            
-            # 4. SALARY GRADES - OVERLAP
-            st.subheader("SALARY GRADES - OVERLAP")
-            fig4, ax4 = plt.subplots(figsize=(10, 8))
-            
-            ax4.barh(y_pos, ranges, left=df['Minimum'], color='gold', alpha=0.8, height=0.6, edgecolor='darkgoldenrod')
-            
-            if 'Overlap %' in df.columns:
-                overlap_positions = df['Minimum'] + (ranges * 0.75)
-                scatter = ax4.scatter(overlap_positions, y_pos, s=150, color='green', alpha=0.7, label='Overlap %')
-                for i, (pos, overlap) in enumerate(zip(overlap_positions, df['Overlap %'])):
-                    if overlap > 0:
-                        ax4.text(pos, i, f'{overlap:.1f}%', ha='center', va='center', fontsize=8, color='white')
-            
-            ax4.set_yticks(y_pos)
-            ax4.set_yticklabels(grades)
-            ax4.set_xlabel(f'Salary ({currency})')
-            ax4.invert_yaxis()
-            ax4.grid(True, alpha=0.3, linestyle='--', axis='x')
-            
-            st.pyplot(fig4)
+        # Chart hanya dirender (dan matplotlib baru dimuat) jika diminta, lalu di-cache per hash hasil
+        show_charts = st.toggle("Show charts", key="show_charts")
+        if show_charts:
+            import charts
+            col1, col2 = st.columns(2)
+            for col, names in [(col1, ['midpoints', 'ranges']), (col2, ['spread', 'overlap'])]:
+                with col:
+                    for name in names:
+                        st.subheader(charts.CHART_TITLES[name])
+                        st.image(charts.render_png(name, df, currency), use_container_width=True)
         
-        # Download charts
+        # Download charts: PNG 300 dpi baru dibuat saat tombol diklik
         st.markdown("---")
         st.subheader("Download Charts")
         
-        col_dl1, col_dl2, col_dl3, col_dl4 = st.columns(4)
-        
-        for col, fig, name in [(col_dl1, fig1, "midpoints"), (col_dl2, fig2, "spread"), 
-                              (col_dl3, fig3, "ranges"), (col_dl4, fig4, "overlap")]:
+        for col, name in zip(st.columns(4), CHART_NAMES):
             with col:
-                buf = BytesIO()
-                fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-                buf.seek(0)
                 st.download_button(
                     label=f"📥 {name.title()}",
-                    data=buf,
+                    data=perf_traced(lambda name=name: chart_download(name, df, currency), f"download chart[{name}]"),
                     file_name=f"salary_{name}.png",
                     mime="image/png",
                     use_container_width=True
                 )
+
+        # Penempatan karyawan: roster dicocokkan ke band hasil lewat join grade (vectorized)
+        st.markdown("---")
+        st.subheader("Workforce Placement")
+        roster_file = st.file_uploader("Employee Roster", type=["xlsx", "csv", "parquet"], key="roster_file",
+                                       help="One row per employee with columns 'Salary Grade' and 'Salary'")
+        if roster_file is not None:
+            try:
+                roster = cache.read_table(roster_file.getvalue(), roster_file.name)
+                summary = cache.placement_summary(roster, df)
+            except (KeyError, ValueError) as e:
+                st.error(f"❌ Roster tidak valid: {e}")
+            else:
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Headcount", f"{int(summary['Headcount'].sum()):,}")
+                m2.metric("Below Minimum", f"{int(summary['Below Min'].sum()):,}")
+                m3.metric("Above Maximum", f"{int(summary['Above Max'].sum()):,}")
+                m4.metric("Cost to Minimum", f"{currency}{summary['Cost to Minimum'].sum():,.0f}")
+                if summary.attrs.get('unmatched'):
+                    st.warning(f"⚠️ {summary.attrs['unmatched']:,} employees have a grade not found in the structure")
+                if summary['No Salary'].sum():
+                    st.warning(f"⚠️ {int(summary['No Salary'].sum()):,} employees have no salary and are excluded "
+                               "from Within Range and Avg Compa-Ratio")
+                if show_charts:
+                    import charts
+                    st.image(charts.render_placement_png(summary, currency), use_container_width=True)
+                st.dataframe(summary, use_container_width=True, hide_index=True)
+                st.download_button("📥 Download Placed Roster",
+                                   data=lambda: placed_roster_csv(roster, df),
+                                   file_name="placed_roster.csv", mime="text/csv")
     else:
         st.info("Please calculate results first in the Results tab")
 
@@ -364,32 +324,221 @@ with tab4:
     st.header("Export Results")
     
     if st.session_state.result_df is not None:
-        col1, col2, col3 = st.columns(3)
+        import export
+        result_df = st.session_state.result_df
+        input_df = st.session_state.input_df
         
+        # File export baru dibuat saat tombol download diklik
+        buttons = [
+            ("📥 Download CSV", 'csv'),
+            ("📊 Download Excel", 'excel'),
+            ("📄 Download JSON", 'json'),
+            ("🗂️ Download Parquet", 'parquet'),
+            ("🏹 Download Arrow", 'arrow'),
+        ]
+        pyarrow_ok = export.has_pyarrow()
+        for col, (label, fmt) in zip(st.columns(len(buttons)), buttons):
+            ext, mime = export.FORMATS[fmt]
+            needs_pyarrow = fmt in ('parquet', 'arrow')
+            with col:
+                st.download_button(label,
+                                   data=perf_traced(lambda fmt=fmt: export.export(fmt, result_df, input_df, currency),
+                                                    f"download {fmt}"),
+                                   file_name=f"salary_structure.{ext}", mime=mime,
+                                   disabled=needs_pyarrow and not pyarrow_ok,
+                                   help="Requires pyarrow" if needs_pyarrow and not pyarrow_ok else None,
+                                   use_container_width=True)
+    
+    else:
+        st.warning("No results to export. Please calculate first in Results tab.")
+
+with tab5:
+    import sweep
+    st.header("Parameter Sweep")
+
+    if st.session_state.input_df is None:
+        st.info("Please upload an Excel file or use template from sidebar.")
+    elif not sweep.SWEEP_PARAMS[scenario]:
+        st.info("Scenario 1 has no parameters to sweep.")
+    else:
+        def range_input(label, default_lo, default_hi, key):
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                lo = st.number_input(f"{label} from", value=default_lo, step=1000.0, key=f"{key}_lo")
+            with c2:
+                hi = st.number_input(f"{label} to", value=default_hi, step=1000.0, key=f"{key}_hi")
+            with c3:
+                steps = st.number_input(f"{label} steps", min_value=1, max_value=1000, value=10, key=f"{key}_steps")
+            return np.linspace(lo, hi, int(steps))
+
+        grid = {}
+        if scenario == 2:
+            grid['lowest_midpoint'] = range_input("Lowest Midpoint", 10000.0, 50000.0, "sw_low")
+            grid['highest_midpoint'] = range_input("Highest Midpoint", 80000.0, 200000.0, "sw_high")
+        elif scenario == 3:
+            grid['lowest_midpoint'] = range_input("Lowest Midpoint", 30000.0, 70000.0, "sw_low")
+        elif scenario == 5:
+            grid['target_percentile'] = st.multiselect("Target Percentiles", [10, 25, 30, 40, 50, 60, 75, 90, 95],
+                                                       default=[30, 40, 50, 60, 75, 90])
+        if st.checkbox("Override Spread % uniformly", value=scenario == 4):
+            grid['spread'] = range_input("Spread %", 20.0, 60.0, "sw_spread")
+
+        col1, col2, col3 = st.columns(3)
         with col1:
-            csv = st.session_state.result_df.to_csv(index=False)
-            st.download_button("📥 Download CSV", data=csv, file_name="salary_structure.csv", 
-                             mime="text/csv", use_container_width=True)
-        
+            rank_by = st.selectbox("Rank by", sweep.METRICS)
         with col2:
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                st.session_state.result_df.to_excel(writer, sheet_name='Salary Structure', index=False)
-                if st.session_state.input_df is not None:
-                    st.session_state.input_df.to_excel(writer, sheet_name='Input Data', index=False)
-            
-            st.download_button("📊 Download Excel", data=output.getvalue(), 
-                             file_name="salary_structure.xlsx", 
-                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                             use_container_width=True)
-        
+            ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
         with col3:
-            json_str = st.session_state.result_df.to_json(orient='records', indent=2)
-            st.download_button("📄 Download JSON", data=json_str, file_name="salary_structure.json", 
-                             mime="application/json", use_container_width=True)
-    
+            top_k = st.number_input("Show top", min_value=1, max_value=1000, value=20)
+
+        total = sweep.grid_size(grid)
+        st.caption(f"{total:,} parameter combinations")
+        if st.button("🔍 Run Sweep", use_container_width=True, disabled=total == 0):
+            with st.spinner("Sweeping..."):
+                try:
+                    st.session_state.sweep_df = sweep.run_sweep(
+                        st.session_state.input_df, scenario, sweep.grid_points(grid),
+                        rank_by=rank_by, ascending=ascending, top_k=int(top_k),
+                        max_workers=0 if total <= sweep.DEFAULT_CHUNK_SIZE else None)
+                except Exception as e:
+                    st.error(f"❌ Sweep error: {str(e)}")
+
+        if st.session_state.get('sweep_df') is not None:
+            st.dataframe(st.session_state.sweep_df, use_container_width=True, height=400)
+
+with tab6:
+    st.header("Structure Optimizer")
+    st.caption("Solve for Midpoint and Spread % per grade that keep Overlap %, Mid Point Differential % "
+               "and Spread % inside the target ranges")
+
+    if st.session_state.input_df is None or 'Salary Grade' not in st.session_state.input_df.columns:
+        st.info("Please upload an Excel file or use template from sidebar.")
     else:
-        st.warning("No results to export. Please calculate first in Results tab.")
+        import optimizer
+        opt_input = st.session_state.input_df
+        targets = {}
+        for col, (name, label) in zip(st.columns(3), [('overlap', "Overlap %"),
+                                                      ('differential', "Mid Point Differential %"),
+                                                      ('spread', "Spread %")]):
+            with col:
+                targets[name] = st.slider(label, min_value=0.0, max_value=200.0 if name == 'spread' else 100.0,
+                                          value=optimizer.DEFAULT_TARGETS[name], step=1.0, key=f"opt_{name}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            default_lowest = float(opt_input['Midpoint'].iloc[0]) if 'Midpoint' in opt_input.columns else 50000.0
+            opt_lowest = st.number_input("Lowest Midpoint", value=default_lowest, min_value=1.0, step=1000.0,
+                                         key="opt_lowest")
+        with col2:
+            opt_starts = st.number_input("Starts", min_value=1, max_value=64, value=optimizer.DEFAULT_STARTS,
+                                         key="opt_starts")
+
+        opt_roster, opt_budget = None, None
+        if st.checkbox("Limit cost to minimum against a roster"):
+            roster_upload = st.file_uploader("Employee Roster", type=["xlsx", "csv", "parquet"], key="opt_roster",
+                                             help="One row per employee with columns 'Salary Grade' and 'Salary'")
+            opt_budget = st.number_input(f"Budget ({currency})", value=100000.0, min_value=0.0, step=10000.0)
+            if roster_upload is not None:
+                opt_roster = cache.read_table(roster_upload.getvalue(), roster_upload.name)
+
+        if st.button("🎯 Optimize", use_container_width=True):
+            with st.spinner("Optimizing..."):
+                try:
+                    st.session_state.optimized_df = optimizer.optimize_structure(
+                        opt_input, lowest_midpoint=opt_lowest, targets=targets,
+                        roster=opt_roster, budget=opt_budget if opt_roster is not None else None,
+                        starts=int(opt_starts), max_workers=0 if opt_starts == 1 else None)
+                except Exception as e:
+                    st.error(f"❌ Optimizer error: {str(e)}")
+
+        optimized = st.session_state.get('optimized_df')
+        if optimized is not None:
+            attrs = optimized.attrs
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Objective", f"{attrs['objective']:.3g}")
+            m2.metric("Converged", "Yes" if attrs['success'] else "No")
+            if 'cost_to_minimum' in attrs:
+                m3.metric("Cost to Minimum", f"{currency}{attrs['cost_to_minimum']:,.0f}")
+            st.dataframe(optimized, use_container_width=True, height=400)
+            if st.button("📈 Use as Result", use_container_width=True):
+                st.session_state.result_df = optimized
+                st.success("✅ Optimized structure is now the current result")
+
+with tab7:
+    st.header("Multi-Year Projection")
+
+    if st.session_state.result_df is not None:
+        import projection
+        df = st.session_state.result_df
+        col1, col2 = st.columns(2)
+        with col1:
+            proj_years = st.slider("Years", min_value=1, max_value=projection.MAX_YEARS, value=projection.DEFAULT_YEARS)
+        with col2:
+            proj_draws = st.number_input("Monte Carlo draws (0 = deterministic)", min_value=0,
+                                         max_value=projection.MAX_DRAWS, value=0, step=1000)
+
+        assumptions = {}
+        for col, (name, label) in zip(st.columns(3), [('salary_increase', "Salary Increase %"),
+                                                      ('inflation', "Inflation %"),
+                                                      ('market_movement', "Market Movement %")]):
+            mean, std = projection.DEFAULT_ASSUMPTIONS[name]
+            with col:
+                mean = st.number_input(f"{label} / year", value=mean, step=0.5, key=f"proj_{name}")
+                std = st.number_input(f"{label} std dev", value=std, min_value=0.0, step=0.5, key=f"proj_{name}_std",
+                                      disabled=proj_draws == 0)
+            assumptions[name] = (mean, std)
+
+        # Proyeksi memakai hasil yang sudah ada di session dan di-cache per (hasil, asumsi)
+        try:
+            bands = cache.projection(df, int(proj_years), int(proj_draws), assumptions)
+        except Exception as e:
+            st.error(f"❌ Projection error: {str(e)}")
+        else:
+            import export
+            # Seperti tab Visualizations, chart baru dirender (dan matplotlib dimuat) jika diminta
+            if 'Salary Grade' in bands.columns and st.toggle("Show projection chart", key="show_projection_chart"):
+                import charts
+                grade = st.selectbox("Grade", df['Salary Grade'].astype(str).tolist(), key="proj_grade")
+                st.image(charts.render_projection_png(bands, grade, currency), use_container_width=True)
+            st.dataframe(bands, use_container_width=True, height=400, hide_index=True)
+            st.download_button("📥 Download Projection CSV", data=lambda: export.to_csv(bands),
+                               file_name="salary_projection.csv", mime="text/csv")
+    else:
+        st.info("Please calculate results first in the Results tab")
+
+# ====================== PERFORMANCE ======================
+trace = perf.stop()
+if trace is not None:
+    st.session_state.perf_trace = trace
+
+with st.expander("⏱️ Performance"):
+    perf_on = st.toggle("Enable instrumentation", key="perf_on",
+                        help="Time each stage (read, validate, calculate, charts, export) on the next run")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.checkbox("Track memory (tracemalloc)", key="perf_memory", disabled=not perf_on)
+    with col2:
+        st.checkbox("cProfile capture", key="perf_profile", disabled=not perf_on)
+
+    last = st.session_state.get('perf_trace')
+    if last is None:
+        st.caption("No trace yet. Enable instrumentation and interact with the app.")
+    else:
+        st.caption(f"Last run: {last.total_s * 1000:,.1f} ms total"
+                   + (f", peak {last.peak_bytes / 1024 ** 2:,.1f} MiB" if last.peak_bytes is not None else ""))
+        st.dataframe(last.summary(), use_container_width=True, hide_index=True)
+        with st.popover("Stage timeline"):
+            st.dataframe(last.to_frame(), use_container_width=True, hide_index=True)
+        if last.profile_stats:
+            st.markdown("**cProfile (top by cumulative time)**")
+            st.dataframe(last.profile_stats, use_container_width=True, hide_index=True)
+        st.download_button("📥 Download trace (JSON)", data=last.to_json(), file_name="perf_trace.json",
+                           mime="application/json", help="Trace Event format; open in chrome://tracing or Perfetto")
+    if perf_downloads:
+        st.markdown("**Downloads**")
+        st.dataframe([{'Download': t.name, 'Total ms': t.total_s * 1000,
+                       'Peak MiB': t.peak_bytes / 1024 ** 2 if t.peak_bytes is not None else None}
+                      for t in perf_downloads], use_container_width=True, hide_index=True)
 
 # ====================== FOOTER ======================
 st.markdown("---")
@@ -0,0 +1,263 @@
+"""Benchmark suite untuk kalkulator skenario, export dan chart.
+
+Contoh:
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --compare bench_baseline.json --threshold 0.25
+    python bench.py --filter scenario --sizes 10 1000
+
+Waktu yang dicatat adalah median dari beberapa pengulangan; memori puncak diukur
+dengan tracemalloc pada run terpisah agar tidak mengganggu pengukuran waktu.
+Kasus import_* mengukur waktu import dingin di interpreter baru (python -X importtime
+memberi rincian per modul jika ada regresi).
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.25
+
+
+# ====================== DATA ======================
+def make_input(n, seed=0):
+    # Satu tabel berisi semua kolom input yang dibutuhkan kelima skenario
+    rng = np.random.default_rng(seed)
+    minimum = np.cumsum(rng.uniform(1_000, 5_000, n)) + 30_000
+    # Differential skenario 3 dikalikan berantai; rata-ratanya diperkecil untuk n besar agar
+    # midpoint grade tertinggi tetap sekitar 100x grade terendah (tidak overflow ke inf/NaN)
+    differential = min(10.0, 100 * np.expm1(np.log(100) / max(n, 1)))
+    return pd.DataFrame({
+        'Salary Grade': [f'G{i}' for i in range(n)],
+        'Minimum': minimum,
+        'Maximum': minimum * rng.uniform(1.2, 1.6, n),
+        'Spread %': rng.uniform(20, 60, n),
+        'Midpoint Differential %': rng.uniform(0, 2 * differential, n),
+        'Midpoint': minimum * 1.2,
+        'Market Rate': minimum * 1.25,
+    })
+
+
+# ====================== KASUS BENCHMARK ======================
+def _calc_case(scenario, **params):
+    def setup(n):
+        return make_input(n)
+
+    def run(df):
+        utils.calculate_scenario(df, scenario, **params)
+    return setup, run
+
+
+def _overlap_case():
+    def setup(n):
+        df = make_input(n)
+        return df['Minimum'].to_numpy(), df['Maximum'].to_numpy()
+
+    def run(arrays):
+        utils.calculate_overlap(*arrays)
+    return setup, run
+
+
+def _validate_case(scenario=None):
+    def setup(n):
+        return make_input(n)
+
+    def run(df):
+        if scenario is None:
+            utils.validate_scenario_1(df)
+        else:
+            utils.validate(df, scenario)
+    return setup, run
+
+
+def _template_case():
+    # Jalur yang dipakai app (cache.template_excel); cache dikosongkan agar yang diukur pembuatannya
+    import cache
+
+    def setup(n):
+        return min(n, len(utils.DEFAULT_GRADE_NAMES))
+
+    def run(num_grades):
+        cache.template_cache.clear()
+        cache.template_excel(5, num_grades)
+    return setup, run
+
+
+def _export_case(fmt):
+    import export
+
+    def setup(n):
+        return utils.calculate_scenario_5(make_input(n), 75)
+
+    def run(result):
+        export.export(fmt, result, currency='$')
+    return setup, run
+
+
+def _chart_case(name):
+    import matplotlib
+    matplotlib.use('Agg')
+    import charts
+
+    def setup(n):
+        return utils.calculate_scenario_4(make_input(n))
+
+    def run(result):
+        charts.CHART_BUILDERS[name](result, '$').savefig(_NullWriter(), format='png', dpi=charts.PREVIEW_DPI)
+    return setup, run
+
+
+def import_time(statement, repeat=5):
+    # Waktu import dingin diukur di proses anak yang baru, tanpa waktu start interpreter
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    times = [float(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                  text=True).stdout)
+             for _ in range(repeat)]
+    return {'time_s': statistics.median(times), 'min_time_s': min(times), 'peak_bytes': 0}
+
+
+class _NullWriter:
+    def write(self, data):
+        return len(data)
+
+
+# Modul yang dimuat saat start: inti perhitungan, server app, dan modul fitur yang sengaja ditunda
+IMPORT_CASES = {
+    'import_utils': 'import utils',
+    'import_cache': 'import cache',
+    'import_app_core': 'import streamlit, utils, cache',
+    'import_charts': 'import charts',
+    'import_export': 'import export',
+    'import_optimizer': 'import optimizer',
+}
+
+
+def build_cases():
+    # nama -> (factory, ukuran yang relevan); ukuran dibatasi untuk kasus yang memang lambat
+    cases = {
+        'calculate_overlap': (_overlap_case, DEFAULT_SIZES),
+        'scenario_1': (lambda: _calc_case(1), DEFAULT_SIZES),
+        'scenario_2': (lambda: _calc_case(2, lowest_midpoint=20_000, highest_midpoint=500_000), DEFAULT_SIZES),
+        'scenario_3': (lambda: _calc_case(3, lowest_midpoint=50_000), DEFAULT_SIZES),
+        'scenario_4': (lambda: _calc_case(4), DEFAULT_SIZES),
+        'scenario_5': (lambda: _calc_case(5, target_percentile=75), DEFAULT_SIZES),
+        'validate_scenario_1': (_validate_case, DEFAULT_SIZES),
+        'template_excel': (_template_case, [10]),
+        'export_csv': (lambda: _export_case('csv'), [10, 1_000, 100_000]),
+        'export_json': (lambda: _export_case('json'), [10, 1_000, 100_000]),
+        'export_excel': (lambda: _export_case('excel'), [10, 1_000]),
+    }
+    for scenario in utils.REQUIRED_COLUMNS:
+        cases[f'validate_{scenario}'] = (lambda scenario=scenario: _validate_case(scenario), DEFAULT_SIZES)
+    for name in ['midpoints', 'spread', 'ranges', 'overlap']:
+        cases[f'chart_{name}'] = (lambda name=name: _chart_case(name), [10, 100, 1_000])
+    return cases
+
+
+# ====================== PENGUKURAN ======================
+def measure(setup, run, n, repeat):
+    data = setup(n)
+    run(data)  # warm-up
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    run(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'time_s': statistics.median(times), 'min_time_s': min(times), 'peak_bytes': peak}
+
+
+def run_suite(filters=None, sizes=None, repeat=5, out=sys.stderr):
+    results = {}
+    for name, statement in IMPORT_CASES.items():
+        if (filters and not any(f in name for f in filters)) or (sizes and 1 not in sizes):
+            continue
+        key = f'{name}[1]'
+        results[key] = import_time(statement, repeat)
+        print(f"{key:32s} {results[key]['time_s'] * 1000:10.2f} ms", file=out)
+    for name, (factory, case_sizes) in build_cases().items():
+        if filters and not any(f in name for f in filters):
+            continue
+        setup, run = factory()
+        for n in case_sizes:
+            if sizes and n not in sizes:
+                continue
+            # Ukuran besar cukup diulang sekali agar suite tetap selesai dalam hitungan menit
+            reps = repeat if n < 100_000 else 1
+            key = f'{name}[{n}]'
+            results[key] = measure(setup, run, n, reps)
+            r = results[key]
+            print(f"{key:32s} {r['time_s'] * 1000:10.2f} ms  {r['peak_bytes'] / 1024 ** 2:9.2f} MiB", file=out)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Regresi = waktu atau memori puncak naik lebih dari threshold (relatif) terhadap baseline
+    regressions = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('time_s', 'peak_bytes'):
+            if base[metric] > 0 and r[metric] > base[metric] * (1 + threshold):
+                regressions.append((key, metric, base[metric], r[metric]))
+    return regressions
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Salary Structure Calculator")
+    parser.add_argument('--filter', nargs='*', help="Hanya kasus yang namanya mengandung teks ini")
+    parser.add_argument('--sizes', nargs='*', type=int, help="Hanya ukuran ini (jumlah baris)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save-baseline', metavar='PATH', help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument('--compare', metavar='PATH', help="Bandingkan dengan baseline JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Batas kenaikan relatif sebelum dianggap regresi (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.filter, args.sizes, args.repeat)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2)
+        print(f"Baseline disimpan ke {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresi (threshold {args.threshold:.0%}):", file=sys.stderr)
+            for key, metric, old, new in regressions:
+                print(f"  {key:32s} {metric:10s} {old:.6g} -> {new:.6g} ({new / old - 1:+.0%})", file=sys.stderr)
+            return 1
+        print(f"\nTidak ada regresi (threshold {args.threshold:.0%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+import perf
+import utils
+
+# ====================== KONSTANTA ======================
+DEFAULT_UPLOAD_CACHE_BYTES = 256 * 1024 ** 2
+DEFAULT_RESULT_CACHE_BYTES = 256 * 1024 ** 2
+DEFAULT_TEMPLATE_CACHE_BYTES = 16 * 1024 ** 2
+DEFAULT_CHART_CACHE_BYTES = 64 * 1024 ** 2
+DEFAULT_SURVEY_CACHE_BYTES = 512 * 1024 ** 2
+
+
+# ====================== LRU CACHE ======================
+class LRUCache:
+    # Cache LRU yang dibatasi total ukuran (byte), aman dipakai bersama oleh banyak sesi Streamlit
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+upload_cache = LRUCache(DEFAULT_UPLOAD_CACHE_BYTES)
+result_cache = LRUCache(DEFAULT_RESULT_CACHE_BYTES)
+template_cache = LRUCache(DEFAULT_TEMPLATE_CACHE_BYTES)
+chart_cache = LRUCache(DEFAULT_CHART_CACHE_BYTES)
+survey_cache = LRUCache(DEFAULT_SURVEY_CACHE_BYTES)
+
+
+# ====================== HASHING ======================
+def hash_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_frame(df):
+    # Hash isi DataFrame (nilai, index, nama kolom dan dtype), bukan identitas objeknya
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _frame_size(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+# ====================== FUNGSI CACHE ======================
+@perf.timed()
+def read_excel(data):
+    # Parse upload Excel berdasarkan hash isi file; dua file bernama sama tetap dibedakan
+    key = hash_bytes(data)
+    df = upload_cache.get(key)
+    if df is None:
+        with perf.stage('pd.read_excel'):
+            df = pd.read_excel(BytesIO(data))
+        upload_cache.put(key, df, _frame_size(df))
+    return df.copy()
+
+
+@perf.timed()
+def read_table(data, filename):
+    # Seperti read_excel, tetapi format dipilih dari ekstensi (.csv, .parquet, .xlsx)
+    key = (hash_bytes(data), os.path.splitext(filename)[1].lower())
+    df = upload_cache.get(key)
+    if df is None:
+        if key[1] == '.csv':
+            df = pd.read_csv(BytesIO(data))
+        elif key[1] == '.parquet':
+            df = pd.read_parquet(BytesIO(data))
+        else:
+            df = pd.read_excel(BytesIO(data))
+        upload_cache.put(key, df, _frame_size(df))
+    return df.copy()
+
+
+@perf.timed('cache.calculate')
+def calculate(df_input, scenario, params):
+    key = (hash_frame(df_input), scenario, tuple(sorted(params.items())))
+    result = result_cache.get(key)
+    if result is None:
+        result = utils.calculate_scenario(df_input, scenario, **params)
+        result_cache.put(key, result, _frame_size(result))
+    return result.copy()
+
+
+def template_excel(scenario, num_grades):
+    key = (scenario, num_grades)
+    data = template_cache.get(key)
+    if data is None:
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            utils.template_frame(scenario, num_grades).to_excel(writer, index=False, sheet_name='Template')
+        data = output.getvalue()
+        template_cache.put(key, data, len(data))
+    return data
+
+
+def placement_summary(roster, structure):
+    import placement
+    key = ('placement', hash_frame(roster), hash_frame(structure))
+    summary = result_cache.get(key)
+    if summary is None:
+        positions = placement.grade_positions(roster, structure)
+        placed = placement.place(roster, structure, positions=positions)
+        summary = placement.summarize(placed, structure, positions=positions)
+        result_cache.put(key, summary, _frame_size(summary))
+    return summary.copy()
+
+
+def projection(result_df, years, draws, assumptions, seed=0):
+    # Hasil skenario dasar diambil dari session, bukan dihitung ulang; hanya proyeksinya di-cache
+    import projection as proj
+    key = ('projection', hash_frame(result_df), years, draws, tuple(sorted(assumptions.items())), seed)
+    bands = result_cache.get(key)
+    if bands is None:
+        bands = proj.project(result_df, years=years, draws=draws, assumptions=assumptions, seed=seed)
+        result_cache.put(key, bands, _frame_size(bands))
+    return bands.copy()
@@ -0,0 +1,216 @@
+from io import BytesIO
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+import cache
+import perf
+
+# ====================== KONSTANTA ======================
+MAX_LABELS = 40
+PREVIEW_DPI = 100
+DOWNLOAD_DPI = 300
+BAR_HEIGHT = 0.6
+CHART_TITLES = {
+    'midpoints': "SALARY MIDPOINTS & PROGRESSION",
+    'spread': "SALARY GRADES - SPREAD",
+    'ranges': "SALARY RANGES BY GRADE",
+    'overlap': "SALARY GRADES - OVERLAP",
+}
+
+
+# ====================== FUNGSI HELPER ======================
+def label_indices(n, max_labels=MAX_LABELS):
+    # Untuk ratusan grade, hanya setiap grade ke-k yang diberi label agar waktu render tetap datar
+    step = max(1, int(np.ceil(n / max_labels)))
+    return np.arange(0, n, step)
+
+
+def _range_bars(ax, minimum, maximum):
+    # Semua bar range digambar sebagai satu PolyCollection, bukan satu artist per grade
+    y = np.arange(len(minimum))
+    top, bottom = y - BAR_HEIGHT / 2, y + BAR_HEIGHT / 2
+    verts = np.stack([
+        np.column_stack([minimum, top]),
+        np.column_stack([minimum, bottom]),
+        np.column_stack([maximum, bottom]),
+        np.column_stack([maximum, top]),
+    ], axis=1)
+    ax.add_collection(PolyCollection(verts, facecolors='gold', edgecolors='darkgoldenrod', alpha=0.8))
+    ax.autoscale_view()
+
+
+def _grade_axis(ax, grades, idx):
+    ax.set_yticks(idx)
+    ax.set_yticklabels(grades[idx])
+    ax.set_ylim(len(grades) - 0.5, -0.5)
+
+
+def _labels(ax, x, y, texts, **kwargs):
+    for xi, yi, text in zip(x, y, texts):
+        ax.text(xi, yi, text, fontsize=8, **kwargs)
+
+
+# ====================== CHART BUILDERS ======================
+def midpoints_figure(df, currency):
+    fig = Figure(figsize=(10, 6))
+    ax1 = fig.subplots()
+    grades = df['Salary Grade'].astype(str).to_numpy()
+    midpoints = df['Midpoint'].to_numpy(dtype=float)
+    x = np.arange(len(grades))
+    idx = label_indices(len(grades))
+    ax1.plot(x, midpoints, color='gold', marker='o', linewidth=3, markersize=8, label='Midpoint')
+
+    if 'Mid Point Differential %' in df.columns:
+        ax2 = ax1.twinx()
+        diff_pct = df['Mid Point Differential %'].to_numpy(dtype=float)
+        ax2.scatter(x, diff_pct, color='green', s=150, alpha=0.7, label='Midpoint Differential %')
+        ax2.set_ylabel('Midpoint Differential (%)', color='green')
+        ax2.tick_params(axis='y', labelcolor='green')
+        _labels(ax2, idx, diff_pct[idx], [f'{d:.1f}%' for d in diff_pct[idx]],
+                ha='center', va='bottom', color='darkgreen')
+
+    ax1.set_xticks(idx)
+    ax1.set_xticklabels(grades[idx])
+    ax1.set_xlabel('Grade')
+    ax1.set_ylabel(f'Salary ({currency})', color='darkgoldenrod')
+    ax1.tick_params(axis='x', rotation=45)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+    _labels(ax1, idx, midpoints[idx], [f'{currency}{mp:,.0f}' for mp in midpoints[idx]],
+            ha='center', va='bottom', color='darkgoldenrod')
+    return fig
+
+
+def ranges_figure(df, currency):
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
+    grades = df['Salary Grade'].astype(str).to_numpy()
+    minimum = df['Minimum'].to_numpy(dtype=float)
+    maximum = df['Maximum'].to_numpy(dtype=float)
+    idx = label_indices(len(grades))
+    _range_bars(ax, minimum, maximum)
+    _labels(ax, minimum[idx], idx, [f'{currency}{v:,.0f}' for v in minimum[idx]], ha='right', va='center')
+    _labels(ax, maximum[idx], idx, [f'{currency}{v:,.0f}' for v in maximum[idx]], ha='left', va='center')
+    _grade_axis(ax, grades, idx)
+    ax.set_xlabel(f'Salary ({currency})')
+    ax.grid(True, alpha=0.3, linestyle='--', axis='x')
+    return fig
+
+
+def _marker_figure(df, currency, column, position, figsize, skip_zero):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    grades = df['Salary Grade'].astype(str).to_numpy()
+    minimum = df['Minimum'].to_numpy(dtype=float)
+    maximum = df['Maximum'].to_numpy(dtype=float)
+    idx = label_indices(len(grades))
+    _range_bars(ax, minimum, maximum)
+
+    if column in df.columns:
+        values = df[column].to_numpy(dtype=float)
+        positions = minimum + (maximum - minimum) * position
+        y = np.arange(len(grades))
+        ax.scatter(positions, y, s=150, color='green', alpha=0.7, label=column)
+        shown = idx[values[idx] > 0] if skip_zero else idx
+        _labels(ax, positions[shown], shown, [f'{v:.1f}%' for v in values[shown]],
+                ha='center', va='center', color='white')
+
+    _grade_axis(ax, grades, idx)
+    ax.set_xlabel(f'Salary ({currency})')
+    ax.grid(True, alpha=0.3, linestyle='--', axis='x')
+    return fig
+
+
+def spread_figure(df, currency):
+    return _marker_figure(df, currency, 'Spread %', 0.5, (10, 6), skip_zero=False)
+
+
+def overlap_figure(df, currency):
+    return _marker_figure(df, currency, 'Overlap %', 0.75, (10, 8), skip_zero=True)
+
+
+def placement_figure(summary, currency):
+    # Komposisi karyawan per grade (di bawah minimum / dalam range / di atas maksimum / tanpa gaji)
+    # sebagai stacked bar, plus rata-rata compa-ratio di sumbu kedua
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
+    grades = summary['Salary Grade'].astype(str).to_numpy()
+    y = np.arange(len(grades))
+    idx = label_indices(len(grades))
+    left = np.zeros(len(grades))
+    for column, color in [('Below Min', 'indianred'), ('Within Range', 'gold'), ('Above Max', 'steelblue'),
+                          ('No Salary', 'lightgray')]:
+        values = summary[column].to_numpy(dtype=float)
+        ax.barh(y, values, left=left, height=BAR_HEIGHT, color=color, label=column)
+        left += values
+
+    ax2 = ax.twiny()
+    ax2.plot(summary['Avg Compa-Ratio'].to_numpy(dtype=float), y, color='green', marker='o', label='Avg Compa-Ratio')
+    ax2.axvline(1.0, color='green', alpha=0.3, linestyle='--')
+    ax2.set_xlabel('Avg Compa-Ratio', color='green')
+    ax2.tick_params(axis='x', labelcolor='green')
+
+    _grade_axis(ax, grades, idx)
+    ax.set_xlabel('Headcount')
+    ax.legend(loc='lower right')
+    ax.grid(True, alpha=0.3, linestyle='--', axis='x')
+    return fig
+
+
+def projection_figure(bands, grade, currency, percentiles=(10, 50, 90)):
+    # Minimum/Midpoint/Maximum satu grade per tahun: garis persentil tengah dan pita lo-hi
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    rows = bands[bands['Salary Grade'].astype(str) == str(grade)]
+    years = rows['Year'].to_numpy()
+    lo, mid, hi = percentiles
+    for name, color in [('Maximum', 'steelblue'), ('Midpoint', 'darkgoldenrod'), ('Minimum', 'indianred')]:
+        ax.fill_between(years, rows[f'{name} P{lo:g}'], rows[f'{name} P{hi:g}'], color=color, alpha=0.2)
+        ax.plot(years, rows[f'{name} P{mid:g}'], color=color, marker='o', label=name)
+    ax.set_xticks(years)
+    ax.set_xlabel('Year')
+    ax.set_ylabel(f'Salary ({currency})')
+    ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3, linestyle='--')
+    return fig
+
+
+CHART_BUILDERS = {
+    'midpoints': midpoints_figure,
+    'spread': spread_figure,
+    'ranges': ranges_figure,
+    'overlap': overlap_figure,
+}
+
+
+# ====================== RENDER ======================
+def _png(name, key, build, dpi):
+    with perf.stage(f'chart[{name}]'):
+        png = cache.chart_cache.get(key)
+        if png is None:
+            with perf.stage('figure'):
+                fig = build()
+            buf = BytesIO()
+            with perf.stage('savefig'):
+                fig.savefig(buf, format="png", dpi=dpi, bbox_inches='tight')
+            png = buf.getvalue()
+            cache.chart_cache.put(key, png, len(png))
+    return png
+
+
+def render_png(name, df, currency, dpi=PREVIEW_DPI):
+    # PNG di-cache per (hash hasil, chart, currency, dpi); Figure tidak memakai pyplot
+    # sehingga langsung dibebaskan setelah disimpan, tanpa plt.close()
+    key = (cache.hash_frame(df), name, currency, dpi)
+    return _png(name, key, lambda: CHART_BUILDERS[name](df, currency), dpi)
+
+
+def render_placement_png(summary, currency, dpi=PREVIEW_DPI):
+    key = (cache.hash_frame(summary), 'placement', currency, dpi)
+    return _png('placement', key, lambda: placement_figure(summary, currency), dpi)
+
+
+def render_projection_png(bands, grade, currency, dpi=PREVIEW_DPI):
+    key = (cache.hash_frame(bands), 'projection', str(grade), currency, dpi)
+    return _png('projection', key, lambda: projection_figure(bands, grade, currency), dpi)
@@ -0,0 +1,205 @@
+"""Headless batch runner for the salary structure calculators.
+
+Contoh:
+    python cli.py input.csv -o hasil.csv --scenario 2 --lowest-midpoint 20000 --highest-midpoint 100000
+    python cli.py survey.parquet -o hasil.parquet --scenario 5 --target-percentile 75 --workers 8
+
+Input dengan kolom 'Structure ID' diproses per chunk berisi struktur utuh (baris satu
+struktur harus berurutan) dan bisa dibagi ke beberapa proses. Tanpa kolom itu, seluruh
+file dianggap satu struktur yang tetap dibaca dan ditulis per chunk (skenario 2 membaca
+file dua kali: sekali untuk menghitung baris). Modul ini sengaja tidak mengimpor
+streamlit/matplotlib.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import io_utils
+import utils
+
+DEFAULT_CHUNKSIZE = io_utils.DEFAULT_CHUNKSIZE
+
+
+# ====================== INPUT ======================
+def structure_chunks(chunks, structure_col=utils.STRUCTURE_ID_COLUMN):
+    # Susun ulang chunk mentah agar setiap chunk hanya berisi struktur yang lengkap.
+    # Struktur terakhir di chunk dibawa ke chunk berikutnya karena mungkin belum selesai.
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        ids = chunk[structure_col]
+        tail = ids.iloc[-1]
+        cut = len(chunk) - int((ids == tail).to_numpy()[::-1].cumprod().sum())
+        carry = chunk.iloc[cut:]
+        if cut > 0:
+            yield chunk.iloc[:cut]
+    if carry is not None and len(carry):
+        yield carry
+
+
+# ====================== VALIDASI ======================
+MAX_REPORTED_ERRORS = 10
+
+
+def _raise_errors(errors):
+    if len(errors):
+        messages = errors['Message'].head(MAX_REPORTED_ERRORS).tolist()
+        if len(errors) > MAX_REPORTED_ERRORS:
+            messages.append(f"... dan {len(errors) - MAX_REPORTED_ERRORS:,} error lainnya")
+        raise ValueError("Validasi gagal:\n  " + "\n  ".join(messages))
+
+
+def _validation_params(params):
+    # Parameter per struktur (Series dari --params) tidak dicek di sini; market_data dicek grade-nya
+    return {name: value for name, value in params.items() if name == 'market_data' or np.isscalar(value)}
+
+
+def validated_chunks(chunks, scenario, params):
+    # Validasi per chunk sebelum dihitung. Baris terakhir chunk sebelumnya ikut divalidasi
+    # sebagai konteks (cek urutan antar chunk, grade pertama), lalu error-nya dibuang karena
+    # sudah dicek di chunk sebelumnya. Chunk berisi struktur utuh tidak butuh konteks.
+    checks = _validation_params(params)
+    previous = None
+    for chunk in chunks:
+        if previous is None or utils.STRUCTURE_ID_COLUMN in chunk.columns:
+            errors = utils.validate(chunk, scenario, checks)
+        else:
+            errors = utils.validate(pd.concat([previous, chunk]), scenario, checks)
+            errors = errors[errors['Row'].isna() | (errors['Row'] != previous.index[0])]
+        _raise_errors(errors)
+        if len(chunk):
+            previous = chunk.iloc[-1:]
+        yield chunk
+
+
+# ====================== RUNNER ======================
+def _calculate_chunk(df, scenario, params):
+    return utils.calculate_batch(df, scenario, **params)
+
+
+def run(input_path, output_path, scenario, params, chunksize=DEFAULT_CHUNKSIZE, workers=None, currency='$'):
+    # Hasil ditulis begitu tiap chunk selesai, dengan urutan yang sama seperti input. Jika gagal
+    # di tengah jalan (misalnya validasi chunk berikutnya), output setengah jadi dihapus.
+    writer = io_utils.open_writer(output_path, currency)
+    try:
+        rows = _run(writer, input_path, scenario, params, chunksize, workers)
+    except BaseException:
+        writer.close()
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    writer.close()
+    return rows
+
+
+def _run(writer, input_path, scenario, params, chunksize, workers):
+    rows = 0
+    chunks = io_utils.read_chunks(input_path, chunksize)
+    first = next(chunks, None)
+    if first is None:
+        return 0
+    if utils.STRUCTURE_ID_COLUMN not in first.columns:
+        # Satu struktur: tetap per chunk, konteks baris sebelumnya dibawa antar chunk
+        n_rows = io_utils.count_rows(input_path, chunksize) if scenario == 2 else None
+        chunks = validated_chunks(_prepend(first, chunks), scenario, params)
+        for result in utils.calculate_scenario_chunks(chunks, scenario, n_rows, **params):
+            writer.write(result)
+            rows += len(result)
+        return rows
+
+    structures = validated_chunks(structure_chunks(_prepend(first, chunks)), scenario, params)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1:
+        for chunk in structures:
+            result = _calculate_chunk(chunk, scenario, params)
+            writer.write(result)
+            rows += len(result)
+        return rows
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [pool.submit(_calculate_chunk, chunk, scenario, params)
+                   for chunk in _take(structures, 2 * workers)]
+        while pending:
+            result = pending.pop(0).result()
+            chunk = next(structures, None)
+            if chunk is not None:
+                pending.append(pool.submit(_calculate_chunk, chunk, scenario, params))
+            writer.write(result)
+            rows += len(result)
+    return rows
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+def _take(iterator, n):
+    for _ in range(n):
+        item = next(iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+def load_params(args):
+    params = {}
+    if args.scenario in (2, 3):
+        params['lowest_midpoint'] = args.lowest_midpoint
+    if args.scenario == 2:
+        params['highest_midpoint'] = args.highest_midpoint
+    if args.scenario == 5:
+        params['target_percentile'] = args.target_percentile
+        if args.survey:
+            import market
+            params['market_data'] = market.sketch_file(args.survey, chunksize=args.chunksize)
+    if args.params:
+        # File parameter per struktur: kolom 'Structure ID' plus kolom nama parameter
+        table = pd.read_csv(args.params).set_index(utils.STRUCTURE_ID_COLUMN)
+        for name in params:
+            if name in table.columns:
+                params[name] = table[name]
+    missing = [name for name, value in params.items() if value is None]
+    if missing:
+        raise SystemExit(f"Skenario {args.scenario} membutuhkan: {', '.join('--' + m.replace('_', '-') for m in missing)}")
+    return params
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Salary Structure Calculator (headless)")
+    parser.add_argument('input', help="File input (.csv, .parquet, .xlsx)")
+    parser.add_argument('-o', '--output', required=True, help="File output (.csv, .parquet, .xlsx)")
+    parser.add_argument('-s', '--scenario', type=int, required=True, choices=sorted(utils.SCENARIO_FUNCTIONS))
+    parser.add_argument('--lowest-midpoint', type=float)
+    parser.add_argument('--highest-midpoint', type=float)
+    parser.add_argument('--target-percentile', type=float)
+    parser.add_argument('--survey', help="File sampel survei pasar untuk skenario 5 (kolom 'Salary Grade', 'Salary')")
+    parser.add_argument('--params', help="CSV parameter per struktur (kolom 'Structure ID' + nama parameter)")
+    parser.add_argument('--currency', default='$', help="Simbol mata uang untuk output .xlsx")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah proses (default: jumlah CPU)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        params = load_params(args)
+        start = time.perf_counter()
+        rows = run(args.input, args.output, args.scenario, params, chunksize=args.chunksize,
+                   workers=args.workers, currency=args.currency)
+    except (ImportError, ValueError) as e:
+        # Format file tidak didukung, pyarrow tidak ada, atau input tidak valid
+        raise SystemExit(str(e))
+    print(f"{rows:,} baris ditulis ke {args.output} dalam {time.perf_counter() - start:.2f} detik", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+from io import BytesIO
+
+import pandas as pd
+
+import perf
+
+# ====================== KONSTANTA ======================
+CURRENCY_COLUMNS = ['Minimum', 'Midpoint', 'Maximum', 'Range', 'Market Rate']
+PERCENT_COLUMNS = ['Spread %', 'Mid Point Differential %', 'Overlap %']
+EXCEL_CHUNK_ROWS = 50_000
+EXCEL_MAX_ROWS = 1_048_576  # termasuk baris header
+EXCEL_MAX_SHEET_NAME = 31
+
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'json': ('json', 'application/json'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Export Parquet/Arrow membutuhkan pyarrow (pip install pyarrow)")
+    return pa
+
+
+def currency_format(currency):
+    # Format angka Excel dengan simbol mata uang yang dipilih, misal "$"#,##0
+    symbol = currency.replace('"', '')
+    return f'"{symbol}"#,##0' if symbol else '#,##0'
+
+
+# ====================== EXCEL STREAMING ======================
+class ExcelStreamWriter:
+    # Workbook openpyxl mode write-only: baris ditulis langsung ke file sementara,
+    # sehingga memori tetap datar untuk sheet besar. Format angka diterapkan per sel.
+    def __init__(self, output, currency='$'):
+        from openpyxl import Workbook
+        self.output = output
+        self.workbook = Workbook(write_only=True)
+        self.formats = {col: currency_format(currency) for col in CURRENCY_COLUMNS}
+        self.formats.update({col: '0.0"%"' for col in PERCENT_COLUMNS})
+        self._sheets = {}
+
+    def append(self, sheet_name, df):
+        # Sheet yang melewati batas baris Excel dilanjutkan ke "<nama> (2)", "<nama> (3)", ...
+        while True:
+            ws, columns, rows, part = self._sheet(sheet_name, df)
+            room = EXCEL_MAX_ROWS - rows
+            if len(df) <= room:
+                break
+            self._write(ws, columns, df.iloc[:room])
+            self._sheets[sheet_name] = (self._create(sheet_name, part + 1, columns), columns, 1, part + 1)
+            df = df.iloc[room:]
+        self._write(ws, columns, df)
+        self._sheets[sheet_name] = (ws, columns, rows + len(df), part)
+
+    def _sheet(self, sheet_name, df):
+        if sheet_name not in self._sheets:
+            columns = list(df.columns)
+            self._sheets[sheet_name] = (self._create(sheet_name, 1, columns), columns, 1, 1)
+        return self._sheets[sheet_name]
+
+    def _create(self, sheet_name, part, columns):
+        if part > 1:
+            suffix = f' ({part})'
+            sheet_name = sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        ws = self.workbook.create_sheet(sheet_name)
+        ws.append([str(c) for c in columns])
+        return ws
+
+    def _write(self, ws, columns, df):
+        from openpyxl.cell import WriteOnlyCell
+        formats = [self.formats.get(c) for c in columns]
+        values = df[columns].astype(object).where(df[columns].notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            cells = []
+            for value, fmt in zip(row, formats):
+                if fmt is not None and value is not None:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.number_format = fmt
+                    cells.append(cell)
+                else:
+                    cells.append(value)
+            ws.append(cells)
+
+    def close(self):
+        if not self._sheets:
+            self.workbook.create_sheet('Sheet1')
+        self.workbook.save(self.output)
+
+
+@perf.timed()
+def to_excel(sheets, currency='$', output=None):
+    # sheets: {nama sheet: DataFrame atau iterable DataFrame (chunk)}
+    buffer = output if output is not None else BytesIO()
+    writer = ExcelStreamWriter(buffer, currency=currency)
+    for name, data in sheets.items():
+        if data is None:
+            continue
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        for chunk in chunks:
+            for start in range(0, max(len(chunk), 1), EXCEL_CHUNK_ROWS):
+                writer.append(name, chunk.iloc[start:start + EXCEL_CHUNK_ROWS])
+    writer.close()
+    if output is None:
+        return buffer.getvalue()
+
+
+# ====================== FORMAT LAIN ======================
+@perf.timed()
+def to_csv(df):
+    return df.to_csv(index=False)
+
+
+@perf.timed()
+def to_json(df):
+    return df.to_json(orient='records', indent=2)
+
+
+@perf.timed()
+def to_parquet(df):
+    _require_pyarrow()
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+@perf.timed()
+def to_arrow(df):
+    pa = _require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def export(fmt, result_df, input_df=None, currency='$'):
+    if fmt == 'csv':
+        return to_csv(result_df)
+    if fmt == 'excel':
+        return to_excel({'Salary Structure': result_df, 'Input Data': input_df}, currency=currency)
+    if fmt == 'json':
+        return to_json(result_df)
+    if fmt == 'parquet':
+        return to_parquet(result_df)
+    if fmt == 'arrow':
+        return to_arrow(result_df)
+    raise ValueError(f"Format export tidak dikenal: {fmt}")
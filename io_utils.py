@@ -0,0 +1,136 @@
+"""Pembaca dan penulis tabel per chunk (.csv, .parquet, .xlsx) untuk file besar.
+
+Dipakai bersama oleh cli, market dan placement; modul ini tidak mengimpor streamlit/matplotlib.
+"""
+import os
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+# ====================== INPUT ======================
+# Index setiap chunk melanjutkan chunk sebelumnya (seperti pd.read_csv dengan chunksize),
+# sehingga nomor baris di pesan validasi merujuk ke baris data di file
+def _frame(rows, header, start):
+    return pd.DataFrame(rows, columns=header, index=pd.RangeIndex(start, start + len(rows)))
+
+
+def _read_excel_chunks(path, chunksize):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        start = 0
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield _frame(buffer, header, start)
+                start += len(buffer)
+                buffer = []
+        if buffer:
+            yield _frame(buffer, header, start)
+    finally:
+        wb.close()
+
+
+def _read_parquet_chunks(path, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Membaca Parquet membutuhkan pyarrow (pip install pyarrow)")
+    start = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        df = batch.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        yield from pd.read_csv(path, chunksize=chunksize)
+    elif ext == '.parquet':
+        yield from _read_parquet_chunks(path, chunksize)
+    elif ext in ('.xlsx', '.xlsm'):
+        yield from _read_excel_chunks(path, chunksize)
+    else:
+        raise ValueError(f"Format input tidak didukung: {ext}")
+
+
+def count_rows(path, chunksize=DEFAULT_CHUNKSIZE):
+    # Jumlah baris data tanpa menyimpan isi file (Parquet cukup dari metadata)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return sum(len(chunk) for chunk in pd.read_csv(path, usecols=[0], chunksize=chunksize))
+    if ext == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Membaca Parquet membutuhkan pyarrow (pip install pyarrow)")
+        return pq.ParquetFile(path).metadata.num_rows
+    return sum(len(chunk) for chunk in read_chunks(path, chunksize))
+
+
+# ====================== OUTPUT ======================
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Menulis Parquet membutuhkan pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _ExcelWriter:
+    def __init__(self, path, currency):
+        import export
+        self.writer = export.ExcelStreamWriter(path, currency=currency)
+
+    def write(self, df):
+        self.writer.append('Salary Structure', df)
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, currency='$'):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return _CsvWriter(path)
+    if ext == '.parquet':
+        return _ParquetWriter(path)
+    if ext == '.xlsx':
+        return _ExcelWriter(path, currency)
+    raise ValueError(f"Format output tidak didukung: {ext}")
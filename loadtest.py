@@ -0,0 +1,162 @@
+"""Load-test harness untuk service.py.
+
+Contoh:
+    python loadtest.py --spawn --requests 5000 --concurrency 64
+    python loadtest.py --port 8765 --scenario 2 --grades 50 --format arrow
+
+Setiap klien memakai satu koneksi keep-alive dan mengirim request berikutnya segera setelah
+respons diterima (closed loop). Hasil: throughput, latensi p50/p95/p99 sisi klien, jumlah
+error, plus snapshot /metrics dari server (termasuk rata-rata ukuran micro-batch).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import service
+import utils
+
+# Parameter contoh per skenario untuk body request
+SAMPLE_PARAMS = {
+    1: {},
+    2: {'lowest_midpoint': 20000, 'highest_midpoint': 100000},
+    3: {'lowest_midpoint': 50000},
+    4: {},
+    5: {'target_percentile': 75},
+}
+
+
+def make_body(scenario, grades, fmt):
+    # Input sintetis yang sama dengan bench.make_input, hanya kolom yang dibutuhkan skenario
+    import bench
+    df = bench.make_input(grades)[['Salary Grade'] + utils.REQUIRED_COLUMNS[scenario]]
+    if scenario == 1:
+        # Maximum acak di bench bisa membuat midpoint turun, yang ditolak validasi
+        df = df.assign(Maximum=df['Minimum'] * 1.4)
+    if fmt == 'arrow':
+        import export
+        return export.to_arrow(df), service.ARROW_TYPES[0]
+    payload = {'rows': df.to_dict(orient='records'), 'params': SAMPLE_PARAMS[scenario]}
+    return json.dumps(payload).encode(), service.JSON_TYPE
+
+
+def _target(scenario, fmt):
+    path = f'/calculate/{scenario}'
+    if fmt == 'arrow' and SAMPLE_PARAMS[scenario]:
+        path += '?' + '&'.join(f'{k}={v}' for k, v in SAMPLE_PARAMS[scenario].items())
+    return path
+
+
+async def _request(reader, writer, method, target, host, body=b'', content_type=service.JSON_TYPE,
+                   accept=service.JSON_TYPE):
+    writer.write((f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {content_type}\r\n"
+                  f"Accept: {accept}\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def _client(host, port, target, body, content_type, accept, counter, total, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            counter[0] += 1
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, 'POST', target, host, body, content_type, accept)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, scenario=2, grades=10, requests=2000, concurrency=32, fmt='json'):
+    body, content_type = make_body(scenario, grades, fmt)
+    accept = service.ARROW_TYPES[0] if fmt == 'arrow' else service.JSON_TYPE
+    target = _target(scenario, fmt)
+    latencies, statuses, counter = [], {}, [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, target, body, content_type, accept, counter, requests,
+                                   latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, metrics = await _request(reader, writer, 'GET', '/metrics', host)
+    finally:
+        writer.close()
+    lat = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': dict(zip(['p50', 'p95', 'p99'], np.percentile(lat, [50, 95, 99]).tolist())),
+        'status': statuses,
+        'server': json.loads(metrics),
+    }
+
+
+async def _wait_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await _request(reader, writer, 'GET', '/health', host)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test untuk service.py")
+    parser.add_argument('--host', default=service.DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=service.DEFAULT_PORT)
+    parser.add_argument('--spawn', action='store_true', help="Jalankan service.py lokal selama pengujian")
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah worker untuk --spawn")
+    parser.add_argument('-s', '--scenario', type=int, default=2, choices=sorted(SAMPLE_PARAMS))
+    parser.add_argument('--grades', type=int, default=10, help="Jumlah grade per request")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--format', choices=['json', 'arrow'], default='json')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service.py'), '--host', args.host, '--port', str(args.port)]
+        if args.workers is not None:
+            command += ['--workers', str(args.workers)]
+        server = subprocess.Popen(command)
+    try:
+        if server is not None:
+            asyncio.run(_wait_ready(args.host, args.port))
+        result = asyncio.run(run_load(args.host, args.port, args.scenario, args.grades, args.requests,
+                                      args.concurrency, args.format))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    lat = result['latency_ms']
+    print(f"{result['requests']:,} request dalam {result['elapsed_s']:.2f} s "
+          f"({result['throughput_rps']:,.0f} req/s)", file=sys.stderr)
+    print(f"latensi p50 {lat['p50']:.2f} ms  p95 {lat['p95']:.2f} ms  p99 {lat['p99']:.2f} ms", file=sys.stderr)
+    print(f"status {result['status']}  rata-rata batch server {result['server']['avg_batch']:.1f}", file=sys.stderr)
+    return 0 if set(result['status']) == {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
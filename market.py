@@ -0,0 +1,169 @@
+import os
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import cache
+import io_utils
+
+# ====================== KONSTANTA ======================
+SURVEY_GRADE_COLUMN = 'Salary Grade'
+SURVEY_VALUE_COLUMN = 'Salary'
+DEFAULT_RELATIVE_ACCURACY = 0.005
+DEFAULT_CHUNKSIZE = 500_000
+
+
+# ====================== DISTRIBUSI PER GRADE ======================
+class _GradeDistribution:
+    # Basis untuk distribusi survei per grade. Subclass mengisi self.grades (pd.Index)
+    # dan mengimplementasikan quantile_table(q) -> array (jumlah grade, jumlah q).
+    # key dipakai sebagai identitas konten agar bisa menjadi bagian key cache hasil.
+    __slots__ = ('grades', 'key')
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.key)) if self.key is not None else id(self)
+
+    def __eq__(self, other):
+        if self.key is None or type(other) is not type(self):
+            return self is other
+        return self.key == other.key
+
+    def quantiles(self, percentiles):
+        percentiles = np.atleast_1d(np.asarray(percentiles, dtype=float))
+        table = self.quantile_table(percentiles / 100)
+        return pd.DataFrame(table, index=self.grades, columns=percentiles)
+
+    def rates(self, grades, percentile):
+        # Nilai persentil untuk setiap baris grades; percentile skalar atau array per baris.
+        # Grade yang tidak ada di survei menghasilkan NaN.
+        grade_idx = self.grades.get_indexer(pd.Index(np.asarray(grades, dtype=object)))
+        pct = np.broadcast_to(np.asarray(percentile, dtype=float), grade_idx.shape)
+        unique_pct, pct_idx = np.unique(pct, return_inverse=True)
+        table = self.quantile_table(unique_pct / 100)
+        out = np.full(len(grade_idx), np.nan)
+        known = grade_idx >= 0
+        if len(table):
+            out[known] = table[grade_idx[known], pct_idx.reshape(-1)[known]]
+        return out
+
+
+class SurveyDistribution(_GradeDistribution):
+    # Distribusi eksak: sampel diurutkan sekali per (grade, nilai), sehingga persentil apa pun
+    # cukup diambil lewat indeks tanpa memindai ulang data mentah.
+    __slots__ = ('values', 'offsets')
+
+    def __init__(self, samples, grade_col=SURVEY_GRADE_COLUMN, value_col=SURVEY_VALUE_COLUMN, key=None):
+        df = samples[[grade_col, value_col]].dropna()
+        codes, grades = pd.factorize(df[grade_col])
+        values = df[value_col].to_numpy(dtype=np.float64)
+        order = np.lexsort((values, codes))
+        self.values = values[order]
+        counts = np.bincount(codes, minlength=len(grades))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.grades = pd.Index(grades)
+        self.key = key
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.offsets.nbytes
+
+    def quantile_table(self, q):
+        # Interpolasi linear antar sampel, sama dengan metode default np.quantile
+        sizes = np.diff(self.offsets)
+        pos = q[None, :] * (sizes[:, None] - 1)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, sizes[:, None] - 1)
+        frac = pos - lo
+        base = self.offsets[:-1, None]
+        v_lo, v_hi = self.values[base + lo], self.values[base + hi]
+        return v_lo + (v_hi - v_lo) * frac
+
+
+class GradeSketch(_GradeDistribution):
+    # Sketch kuantil yang bisa digabung (mergeable) untuk file survei yang di-stream: setiap
+    # nilai masuk ke bucket logaritmik sehingga error relatif persentil <= relative_accuracy.
+    # Hanya menyimpan hitungan per (grade, bucket), bukan sampel mentah. Nilai <= 0 diabaikan.
+    __slots__ = ('relative_accuracy', 'gamma', 'counts')
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, key=None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.counts = pd.Series(dtype=np.int64)
+        self.grades = pd.Index([])
+        self.key = key
+
+    @property
+    def nbytes(self):
+        return int(self.counts.memory_usage(deep=True))
+
+    def update(self, grades, values):
+        values = np.asarray(values, dtype=np.float64)
+        grades = np.asarray(grades, dtype=object)
+        keep = values > 0
+        buckets = np.ceil(np.log(values[keep]) / np.log(self.gamma)).astype(np.int64)
+        new = pd.Series(1, index=pd.MultiIndex.from_arrays([grades[keep], buckets])).groupby(level=[0, 1]).sum()
+        self._add(new)
+        return self
+
+    def update_frame(self, samples, grade_col=SURVEY_GRADE_COLUMN, value_col=SURVEY_VALUE_COLUMN):
+        return self.update(samples[grade_col].to_numpy(), samples[value_col].to_numpy())
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Sketch dengan relative_accuracy berbeda tidak bisa digabung")
+        self._add(other.counts)
+        return self
+
+    def _add(self, counts):
+        merged = counts if self.counts.empty else self.counts.add(counts, fill_value=0)
+        self.counts = merged.astype(np.int64).sort_index()
+        self.grades = pd.Index(self.counts.index.get_level_values(0).unique())
+
+    def quantile_table(self, q):
+        if self.counts.empty:
+            return np.zeros((0, len(q)))
+        c = self.counts.to_numpy()
+        buckets = self.counts.index.get_level_values(1).to_numpy()
+        codes = self.grades.get_indexer(self.counts.index.get_level_values(0))
+        cum = np.cumsum(c)
+        sizes = np.bincount(codes, weights=c, minlength=len(self.grades))
+        base = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        target = base[:, None] + q[None, :] * (sizes[:, None] - 1)
+        idx = np.searchsorted(cum, target, side='right')
+        return 2 * self.gamma ** buckets[idx] / (self.gamma + 1)
+
+
+# ====================== LOADER ======================
+def _read_samples(data, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(BytesIO(data))
+    if ext == '.parquet':
+        return pd.read_parquet(BytesIO(data))
+    return pd.read_excel(BytesIO(data))
+
+
+def load_survey(data, filename, grade_col=SURVEY_GRADE_COLUMN, value_col=SURVEY_VALUE_COLUMN):
+    # Distribusi eksak dari upload survei, di-cache per hash isi file. Mengganti persentil
+    # target hanya membaca tabel yang sudah terurut, tanpa parsing/scan ulang.
+    key = (cache.hash_bytes(data), grade_col, value_col)
+    dist = cache.survey_cache.get(key)
+    if dist is None:
+        dist = SurveyDistribution(_read_samples(data, filename), grade_col, value_col, key=key)
+        cache.survey_cache.put(key, dist, dist.nbytes)
+    return dist
+
+
+def sketch_file(path, grade_col=SURVEY_GRADE_COLUMN, value_col=SURVEY_VALUE_COLUMN,
+                relative_accuracy=DEFAULT_RELATIVE_ACCURACY, chunksize=DEFAULT_CHUNKSIZE):
+    # Bangun sketch dari file survei besar per chunk (memori terbatas), di-cache per path+mtime
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, grade_col, value_col, relative_accuracy)
+    sketch = cache.survey_cache.get(key)
+    if sketch is None:
+        sketch = GradeSketch(relative_accuracy, key=key)
+        for chunk in io_utils.read_chunks(path, chunksize):
+            sketch.update_frame(chunk, grade_col, value_col)
+        cache.survey_cache.put(key, sketch, sketch.nbytes)
+    return sketch
@@ -0,0 +1,212 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+# ====================== KONSTANTA ======================
+# Rentang target (lo, hi) dalam persen. Spread menjadi batas variabel, overlap dan
+# differential menjadi penalti kuadrat di luar rentang.
+DEFAULT_TARGETS = {
+    'overlap': (30.0, 60.0),
+    'differential': (10.0, 20.0),
+    'spread': (30.0, 60.0),
+}
+DEFAULT_REGULARIZATION = 1e-3
+DEFAULT_STARTS = 8
+DEFAULT_MAX_ITER = 500
+
+
+# ====================== BIAYA ROSTER ======================
+class _RosterCost:
+    # Biaya menaikkan gaji ke minimum per grade: cost_g(a) = k * a - sum(k gaji terendah),
+    # k = jumlah karyawan dengan gaji < a. Gaji diurutkan sekali per grade lalu digeser per
+    # grade (key = kode * span + gaji) sehingga satu searchsorted melayani semua grade.
+    # Turunannya terhadap minimum grade adalah k.
+    def __init__(self, roster, grades, grade_col='Salary Grade', salary_col='Salary'):
+        codes = pd.Index(grades).get_indexer(roster[grade_col])
+        salary = roster[salary_col].to_numpy(dtype=np.float64)
+        keep = (codes >= 0) & np.isfinite(salary)
+        codes, salary = codes[keep], salary[keep]
+        self.low = salary.min() if len(salary) else 0.0
+        self.span = (salary.max() - self.low if len(salary) else 0.0) + 1.0
+        order = np.lexsort((salary, codes))
+        self.keys = codes[order] * self.span + (salary[order] - self.low)
+        self.prefix = np.concatenate([[0.0], np.cumsum(salary[order])])
+        counts = np.bincount(codes, minlength=len(grades))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.n_grades = len(grades)
+
+    def __call__(self, minimum):
+        shifted = np.arange(self.n_grades) * self.span + (np.clip(minimum, self.low, self.low + self.span) - self.low)
+        end = np.searchsorted(self.keys, shifted, side='left')
+        below = end - self.offsets[:-1]
+        cost = below * minimum - (self.prefix[end] - self.prefix[self.offsets[:-1]])
+        return cost.sum(), below.astype(float)
+
+
+# ====================== OBJEKTIF ======================
+def _unpack(x, n):
+    # Spread disimpan sebagai pecahan (bukan persen) agar skala kedua kelompok variabel sebanding
+    midpoint = np.exp(x[:n])
+    spread = x[n:] * 100
+    return midpoint, spread, midpoint * (1 - spread / 200), midpoint * (1 + spread / 200)
+
+
+def _penalty(values, bounds):
+    # Kuadrat jarak (dalam pecahan, bukan persen) ke rentang target beserta turunannya
+    excess = (values - np.clip(values, *bounds)) / 100
+    return (excess ** 2).sum(), 2 * excess / 100
+
+
+def objective(x, n, targets, anchor, regularization=DEFAULT_REGULARIZATION):
+    # x = [log midpoint (n), spread % / 100 (n)]. Rumus overlap dan differential sama dengan
+    # utils.calculate_overlap / _differential, tetapi overlap tidak dipotong di 0 agar
+    # objektif tetap mulus. Mengembalikan (nilai, gradien) untuk dipakai dengan jac=True.
+    midpoint, spread, minimum, maximum = _unpack(x, n)
+    grad = np.zeros_like(x)
+    g_u, g_s = grad[:n], grad[n:]
+
+    # Overlap grade i terhadap grade i-1: 100 * (max[i-1] - min[i]) / (max[i-1] - min[i-1])
+    width = maximum[:-1] - minimum[:-1]
+    overlap = (maximum[:-1] - minimum[1:]) / width * 100
+    value, d_overlap = _penalty(overlap, targets['overlap'])
+    ratio = 100 * minimum[1:] / width
+    g_u[:-1] += d_overlap * ratio
+    g_u[1:] -= d_overlap * ratio
+    g_s[:-1] += 100 * d_overlap * midpoint[:-1] * (minimum[1:] - midpoint[:-1]) / width ** 2
+    g_s[1:] += 100 * d_overlap * midpoint[1:] / (2 * width)
+
+    # Mid Point Differential %: 100 * (mid[i] / mid[i-1] - 1)
+    growth = np.exp(x[1:n] - x[:n - 1]) * 100
+    part, d_diff = _penalty(growth - 100, targets['differential'])
+    value += part
+    g_u[1:] += d_diff * growth
+    g_u[:-1] -= d_diff * growth
+
+    # Regularisasi kecil ke struktur awal (anchor) agar solusi unik di dalam rentang target
+    u0, s0 = anchor
+    du, ds = x[:n] - u0, x[n:] - s0
+    value += regularization * ((du ** 2).sum() + (ds ** 2).sum()) / n
+    g_u += 2 * regularization * du / n
+    g_s += 2 * regularization * ds / n
+    return value, grad
+
+
+def _budget_constraint(roster_cost, n, budget):
+    # Dinormalisasi ke budget: (budget - biaya) / budget >= 0
+    scale = max(budget, 1.0)
+
+    def fun(x):
+        _, _, minimum, _ = _unpack(x, n)
+        return (budget - roster_cost(minimum)[0]) / scale
+
+    def jac(x):
+        midpoint, _, minimum, _ = _unpack(x, n)
+        below = roster_cost(minimum)[1]
+        return -np.concatenate([below * minimum, -below * midpoint / 2]) / scale
+
+    return {'type': 'ineq', 'fun': fun, 'jac': jac}
+
+
+# ====================== SOLVER ======================
+def initial_structure(df_input, lowest_midpoint, targets):
+    # Titik awal: kolom Midpoint / Spread % input jika ada, selain itu progresi geometris
+    # dari lowest_midpoint dengan differential dan spread di tengah rentang target
+    n = len(df_input)
+    if 'Midpoint' in df_input.columns:
+        midpoint = df_input['Midpoint'].to_numpy(dtype=np.float64)
+    else:
+        differential = np.full(n, np.mean(targets['differential']))
+        midpoint = utils.calculate_midpoint_progression(differential, lowest_midpoint)
+    if 'Spread %' in df_input.columns:
+        spread = df_input['Spread %'].to_numpy(dtype=np.float64)
+    else:
+        spread = np.full(n, np.mean(targets['spread']))
+    return np.concatenate([np.log(midpoint), np.clip(spread, *targets['spread']) / 100])
+
+
+def solve(x0, n, targets, anchor, bounds, constraints=(), regularization=DEFAULT_REGULARIZATION,
+          max_iter=DEFAULT_MAX_ITER):
+    from scipy.optimize import minimize
+    method = 'SLSQP' if constraints else 'L-BFGS-B'
+    result = minimize(objective, x0, args=(n, targets, anchor, regularization), jac=True, method=method,
+                      bounds=bounds, constraints=constraints, options={'maxiter': max_iter})
+    return result.x, float(result.fun), bool(result.success)
+
+
+def _solve_start(x0, n, targets, anchor, bounds, roster_cost, budget, regularization, max_iter):
+    constraints = [_budget_constraint(roster_cost, n, budget)] if roster_cost is not None else []
+    return solve(x0, n, targets, anchor, bounds, constraints, regularization, max_iter)
+
+
+def start_points(x0, n, targets, starts, seed=None):
+    # Start pertama = titik awal apa adanya; sisanya diacak di sekitar midpoint awal dan
+    # uniform di dalam rentang spread
+    rng = np.random.default_rng(seed)
+    points = [x0]
+    for _ in range(starts - 1):
+        x = x0.copy()
+        x[1:n] += rng.normal(0, 0.1, n - 1)
+        x[n:] = rng.uniform(*targets['spread'], n) / 100
+        points.append(x)
+    return points
+
+
+def optimize_structure(df_input, lowest_midpoint=None, targets=None, roster=None, budget=None,
+                       starts=DEFAULT_STARTS, max_workers=None, seed=None,
+                       regularization=DEFAULT_REGULARIZATION, max_iter=DEFAULT_MAX_ITER):
+    # Cari Midpoint dan Spread % per grade yang memenuhi rentang target overlap, differential
+    # dan spread. Midpoint grade pertama dikunci ke lowest_midpoint (default: Midpoint input).
+    # Dengan roster + budget, biaya menaikkan gaji ke minimum dibatasi <= budget.
+    # Hasil berupa tabel skenario 4 yang dihitung ulang lewat utils.calculate_scenario_4;
+    # attrs berisi nilai objektif, status solver dan jumlah start.
+    targets = {**DEFAULT_TARGETS, **(targets or {})}
+    for name, (lo, hi) in targets.items():
+        if lo > hi:
+            raise ValueError(f"Rentang target {name} tidak valid: {lo} > {hi}")
+    if targets['spread'][0] <= 0:
+        raise ValueError("Batas bawah spread harus > 0")
+    n = len(df_input)
+    if n < 2:
+        raise ValueError("Optimasi membutuhkan minimal 2 grade")
+    if lowest_midpoint is None:
+        if 'Midpoint' not in df_input.columns:
+            raise ValueError("lowest_midpoint wajib diisi jika input tidak punya kolom Midpoint")
+        lowest_midpoint = float(df_input['Midpoint'].iloc[0])
+    if (roster is None) != (budget is None):
+        raise ValueError("roster dan budget harus diisi bersamaan")
+
+    x0 = initial_structure(df_input, lowest_midpoint, targets)
+    x0[0] = np.log(lowest_midpoint)
+    anchor = (x0[:n].copy(), x0[n:].copy())
+    log_lowest = np.log(lowest_midpoint)
+    bounds = [(log_lowest, log_lowest)] + [(None, None)] * (n - 1) + [(targets['spread'][0] / 100, targets['spread'][1] / 100)] * n
+    roster_cost = _RosterCost(roster, df_input['Salary Grade']) if roster is not None else None
+
+    points = start_points(x0, n, targets, starts, seed)
+    args = (n, targets, anchor, bounds, roster_cost, budget, regularization, max_iter)
+    if max_workers == 0 or len(points) == 1:
+        results = [_solve_start(x, *args) for x in points]
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(points))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_solve_start, points, *[[a] * len(points) for a in args]))
+
+    # Solusi terbaik: yang memenuhi budget (jika ada) dengan objektif terkecil
+    def rank(result):
+        x, fun, success = result
+        feasible = roster_cost is None or roster_cost(_unpack(x, n)[2])[0] <= budget * (1 + 1e-6)
+        return (not feasible, fun)
+    x, fun, success = min(results, key=rank)
+
+    midpoint, spread, minimum, _ = _unpack(x, n)
+    df = pd.DataFrame({'Salary Grade': df_input['Salary Grade'].to_numpy(), 'Midpoint': midpoint,
+                       'Spread %': spread})
+    result = utils.calculate_scenario_4(df)
+    result.attrs.update({'objective': fun, 'success': success, 'starts': len(points)})
+    if roster_cost is not None:
+        result.attrs['cost_to_minimum'] = float(roster_cost(minimum)[0])
+    return result
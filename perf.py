@@ -0,0 +1,269 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentasi per thread: setiap run script Streamlit (atau pemanggil lain) memulai Trace
+# sendiri lewat start()/run(). Tanpa Trace aktif, stage() dan @timed hanya melakukan satu
+# lookup threading.local, sehingga overhead saat instrumentasi mati dapat diabaikan.
+# Modul ini hanya memakai stdlib saat diimpor (tracemalloc/cProfile/pandas dimuat saat dipakai).
+# Catatan: tracemalloc bersifat global per proses, jadi angka memori paling akurat jika hanya
+# satu sesi yang merekam memori pada satu waktu.
+
+# ====================== KONSTANTA ======================
+PROFILE_TOP = 30
+MAX_DOWNLOAD_TRACES = 10
+
+_local = threading.local()
+# Trace yang merekam memori per thread; tracemalloc yang dinyalakan modul ini baru dimatikan jika
+# tidak ada lagi trace memori yang hidup (termasuk trace yatim di thread yang sudah mati)
+_memory_lock = threading.Lock()
+_memory_traces = {}
+_owns_tracemalloc = False
+
+
+# ====================== TRACE ======================
+class Trace:
+    __slots__ = ('name', 'memory', 'profile', 'events', 'total_s', 'peak_bytes', 'profile_stats',
+                 '_t0', '_stack', '_profiler')
+
+    def __init__(self, name, memory=False, profile=False):
+        self.name = name
+        self.memory = memory
+        self.profile = profile
+        self.events = []
+        self.total_s = None
+        self.peak_bytes = None
+        self.profile_stats = []
+        self._stack = []
+        self._profiler = None
+        if memory:
+            _acquire_tracemalloc(self)
+        if profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._t0 = time.perf_counter()
+
+    def _enter(self, name):
+        mem = 0
+        if self.memory:
+            import tracemalloc
+            mem, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Puncak parent sejauh ini disimpan sebelum reset untuk stage anak
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        self._stack.append([name, time.perf_counter(), mem, 0])
+
+    def _exit(self):
+        end = time.perf_counter()
+        name, start, mem, child_peak = self._stack.pop()
+        event = {'stage': name, 'depth': len(self._stack), 'start_s': start - self._t0, 'wall_s': end - start}
+        if self.memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, child_peak)
+            event['peak_bytes'] = peak - mem
+            event['alloc_bytes'] = current - mem
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+        self.events.append(event)
+
+    def finish(self):
+        self.total_s = time.perf_counter() - self._t0
+        while self._stack:
+            self._exit()
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_stats = _top_functions(self._profiler)
+            self._profiler = None
+        if self.memory:
+            import tracemalloc
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            _release_tracemalloc(self)
+        return self
+
+    # ---------- laporan ----------
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame(self.events, columns=['stage', 'depth', 'start_s', 'wall_s', 'peak_bytes', 'alloc_bytes'])
+        return df.sort_values('start_s', kind='stable').reset_index(drop=True)
+
+    def summary(self):
+        # Per stage: jumlah panggilan, total & maksimum wall time (ms), puncak memori (MiB)
+        import pandas as pd
+        df = self.to_frame()
+        if df.empty:
+            return pd.DataFrame(columns=['Stage', 'Calls', 'Total ms', 'Max ms', 'Peak MiB'])
+        grouped = df.groupby('stage', sort=False)
+        summary = pd.DataFrame({
+            'Calls': grouped.size(),
+            'Total ms': grouped['wall_s'].sum() * 1000,
+            'Max ms': grouped['wall_s'].max() * 1000,
+            'Peak MiB': grouped['peak_bytes'].max() / 1024 ** 2,
+        }).rename_axis('Stage').reset_index()
+        return summary.sort_values('Total ms', ascending=False, kind='stable').reset_index(drop=True)
+
+    def to_dict(self):
+        # Format Trace Event (chrome://tracing / Perfetto) plus metadata dan hasil cProfile
+        events = []
+        for e in self.events:
+            args = {k: e[k] for k in ('peak_bytes', 'alloc_bytes') if k in e}
+            events.append({'name': e['stage'], 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': e['start_s'] * 1e6, 'dur': e['wall_s'] * 1e6, 'args': args})
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'name': self.name, 'total_s': self.total_s, 'peak_bytes': self.peak_bytes,
+                          'memory': self.memory, 'profile': self.profile},
+            'profile': self.profile_stats,
+        }
+
+    def to_json(self):
+        import json
+        return json.dumps(self.to_dict(), indent=2)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+
+def _acquire_tracemalloc(trace):
+    global _owns_tracemalloc
+    import tracemalloc
+    with _memory_lock:
+        _memory_traces[threading.get_ident()] = trace
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracemalloc = True
+        tracemalloc.reset_peak()
+
+
+def _release_tracemalloc(trace=None):
+    global _owns_tracemalloc
+    import tracemalloc
+    with _memory_lock:
+        alive = {t.ident for t in threading.enumerate()}
+        for ident, other in list(_memory_traces.items()):
+            if other is trace or ident not in alive:
+                del _memory_traces[ident]
+        if not _memory_traces and _owns_tracemalloc:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _owns_tracemalloc = False
+
+
+def _top_functions(profiler, limit=PROFILE_TOP):
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = [{'function': f'{func} ({file}:{line})', 'ncalls': nc, 'tottime_s': tt, 'cumtime_s': ct}
+            for (file, line, func), (cc, nc, tt, ct, callers) in stats.items()]
+    rows.sort(key=lambda r: r['cumtime_s'], reverse=True)
+    return rows[:limit]
+
+
+# ====================== STAGE ======================
+class _Stage:
+    __slots__ = ('trace', 'name')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.trace._enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.trace._exit()
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def active():
+    return getattr(_local, 'trace', None)
+
+
+def stage(name):
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NULL_STAGE
+    return _Stage(trace, name)
+
+
+def timed(name=None):
+    # Decorator: catat fungsi sebagai stage (default nama fungsi) jika ada Trace aktif
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, 'trace', None)
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Stage(trace, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ====================== RUN ======================
+def reset():
+    # Buang trace yang tidak sempat di-stop (misalnya run Streamlit yang berhenti karena
+    # exception) dan matikan tracemalloc yang tertinggal, termasuk dari thread yang sudah mati
+    stale = getattr(_local, 'trace', None)
+    _local.trace = None
+    if stale is not None:
+        stale.finish()
+    if _owns_tracemalloc:
+        _release_tracemalloc()
+
+
+def start(name='run', memory=False, profile=False):
+    reset()
+    _local.trace = Trace(name, memory, profile)
+    return _local.trace
+
+
+def stop():
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    return trace.finish() if trace is not None else None
+
+
+@contextmanager
+def run(name='run', memory=False, profile=False):
+    trace = start(name, memory, profile)
+    try:
+        yield trace
+    finally:
+        stop()
+
+
+def traced(func, name, sink, memory=False, profile=False):
+    # Bungkus callable yang dijalankan belakangan (misalnya data download_button). Di dalam
+    # Trace aktif ia menjadi stage biasa; di luar itu ia direkam sebagai Trace sendiri ke sink.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if active() is not None:
+            with stage(name):
+                return func(*args, **kwargs)
+        with run(name, memory, profile) as trace:
+            result = func(*args, **kwargs)
+        sink.append(trace)
+        del sink[:-MAX_DOWNLOAD_TRACES]
+        return result
+    return wrapper
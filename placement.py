@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+import io_utils
+import utils
+
+# ====================== KONSTANTA ======================
+ROSTER_GRADE_COLUMN = 'Salary Grade'
+ROSTER_SALARY_COLUMN = 'Salary'
+DEFAULT_CHUNKSIZE = 500_000
+TOTAL_COLUMNS = ['Headcount', 'Below Min', 'Within Range', 'Above Max', 'No Salary', 'Compa-Ratio Sum',
+                 'Cost to Minimum']
+COUNT_COLUMNS = ['Headcount', 'Below Min', 'Within Range', 'Above Max', 'No Salary']
+
+
+# ====================== PENEMPATAN ======================
+def grade_positions(roster, structure, grade_col=ROSTER_GRADE_COLUMN, structure_col=None):
+    # Posisi baris band di tabel struktur untuk setiap karyawan (-1 jika grade tidak ada).
+    # Join kategorikal lewat hash index, bukan loop per karyawan. Dengan structure_col,
+    # join dilakukan pada pasangan (Structure ID, grade).
+    if structure_col is None:
+        index = pd.Index(structure['Salary Grade'])
+        keys = roster[grade_col]
+    else:
+        index = pd.MultiIndex.from_arrays([structure[structure_col], structure['Salary Grade']])
+        keys = pd.MultiIndex.from_arrays([roster[structure_col], roster[grade_col]])
+    if not index.is_unique:
+        raise ValueError("Grade di tabel struktur harus unik")
+    return index.get_indexer(keys)
+
+
+def place(roster, structure, grade_col=ROSTER_GRADE_COLUMN, salary_col=ROSTER_SALARY_COLUMN, structure_col=None,
+          positions=None):
+    # Tambahkan Compa-Ratio, Range Penetration %, flag di bawah minimum / di atas maksimum dan
+    # biaya menaikkan gaji ke minimum. structure adalah hasil calculate_scenario_*.
+    # positions (hasil grade_positions) boleh diberikan agar join tidak dihitung dua kali.
+    if positions is None:
+        positions = grade_positions(roster, structure, grade_col, structure_col)
+    return _place(roster, structure, positions, salary_col)
+
+
+def _place(roster, structure, pos, salary_col):
+    matched = pos >= 0
+    take = np.where(matched, pos, 0)
+
+    def band(name):
+        values = structure[name].to_numpy(dtype=np.float64)[take]
+        values[~matched] = np.nan
+        return values
+
+    minimum, midpoint, maximum = band('Minimum'), band('Midpoint'), band('Maximum')
+    salary = roster[salary_col].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        compa = salary / midpoint
+        penetration = (salary - minimum) / (maximum - minimum) * 100
+    df = roster.copy(deep=False)
+    df['Grade Matched'] = matched
+    df['Compa-Ratio'] = compa
+    df['Range Penetration %'] = penetration
+    df['Below Min'] = matched & (salary < minimum)
+    df['Above Max'] = matched & (salary > maximum)
+    df['Cost to Minimum'] = np.where(df['Below Min'].to_numpy(), minimum - salary, 0.0)
+    return df
+
+
+# ====================== RINGKASAN ======================
+def summary_totals(placed, positions, n_bands, salary_col=ROSTER_SALARY_COLUMN):
+    # Jumlahan per band yang bisa dijumlahkan antar chunk (mergeable). Karyawan tanpa gaji
+    # dihitung di 'No Salary' saja: tidak masuk Within Range maupun rata-rata compa-ratio.
+    matched = positions >= 0
+    pos = positions[matched]
+    below = placed['Below Min'].to_numpy()[matched]
+    above = placed['Above Max'].to_numpy()[matched]
+    missing = placed[salary_col].isna().to_numpy()[matched]
+
+    def total(weights=None):
+        return np.bincount(pos, weights=weights, minlength=n_bands)
+
+    return pd.DataFrame({
+        'Headcount': total(),
+        'Below Min': total(below.astype(float)),
+        'Within Range': total((~below & ~above & ~missing).astype(float)),
+        'Above Max': total(above.astype(float)),
+        'No Salary': total(missing.astype(float)),
+        'Compa-Ratio Sum': total(np.where(missing, 0.0, placed['Compa-Ratio'].to_numpy()[matched])),
+        'Cost to Minimum': total(placed['Cost to Minimum'].to_numpy()[matched]),
+    })
+
+
+def finalize_summary(totals, structure, unmatched=0):
+    summary = pd.DataFrame({'Salary Grade': structure['Salary Grade'].to_numpy()})
+    if utils.STRUCTURE_ID_COLUMN in structure.columns:
+        summary.insert(0, utils.STRUCTURE_ID_COLUMN, structure[utils.STRUCTURE_ID_COLUMN].to_numpy())
+    for col in COUNT_COLUMNS:
+        summary[col] = totals[col].to_numpy().astype(np.int64)
+    salaried = totals['Headcount'].to_numpy() - totals['No Salary'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['Avg Compa-Ratio'] = totals['Compa-Ratio Sum'].to_numpy() / salaried
+    summary['Cost to Minimum'] = totals['Cost to Minimum'].to_numpy()
+    summary.attrs['unmatched'] = int(unmatched)
+    return summary
+
+
+def summarize(placed, structure, grade_col=ROSTER_GRADE_COLUMN, salary_col=ROSTER_SALARY_COLUMN,
+              structure_col=None, positions=None):
+    if positions is None:
+        positions = grade_positions(placed, structure, grade_col, structure_col)
+    totals = summary_totals(placed, positions, len(structure), salary_col)
+    return finalize_summary(totals, structure, unmatched=int((positions < 0).sum()))
+
+
+def place_file(path, structure, output=None, grade_col=ROSTER_GRADE_COLUMN, salary_col=ROSTER_SALARY_COLUMN,
+               structure_col=None, chunksize=DEFAULT_CHUNKSIZE, currency='$'):
+    # Proses roster besar per chunk: hasil per karyawan ditulis ke output (opsional) saat
+    # chunk selesai, sementara ringkasan per band diakumulasikan. Mengembalikan ringkasan.
+    writer = io_utils.open_writer(output, currency) if output else None
+    totals = pd.DataFrame(0.0, index=range(len(structure)), columns=TOTAL_COLUMNS)
+    unmatched = 0
+    try:
+        for chunk in io_utils.read_chunks(path, chunksize):
+            positions = grade_positions(chunk, structure, grade_col, structure_col)
+            placed = _place(chunk, structure, positions, salary_col)
+            totals += summary_totals(placed, positions, len(structure), salary_col)
+            unmatched += int((positions < 0).sum())
+            if writer is not None:
+                writer.write(placed)
+    finally:
+        if writer is not None:
+            writer.close()
+    return finalize_summary(totals, structure, unmatched)
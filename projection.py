@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+import utils
+
+# ====================== KONSTANTA ======================
+# Asumsi kenaikan tahunan dalam persen sebagai (rata-rata, standar deviasi). Semua komponen
+# digabung secara multiplikatif menjadi pergerakan range per tahun; isi 0 untuk komponen
+# yang tidak dipakai. Rata-rata boleh skalar, array per tahun (years,) atau (years, grade).
+ASSUMPTIONS = ['salary_increase', 'inflation', 'market_movement']
+DEFAULT_ASSUMPTIONS = {
+    'salary_increase': (3.0, 0.0),
+    'inflation': (0.0, 0.0),
+    'market_movement': (0.0, 0.0),
+}
+DEFAULT_YEARS = 5
+DEFAULT_PERCENTILES = (10, 50, 90)
+MAX_YEARS = 10
+MAX_DRAWS = 100_000
+# Batas sel (tahun x draw x grade) per potongan grade di project(); satu array float64
+# sebesar ini ~16 MB, sehingga memori puncak tidak bergantung pada jumlah grade
+CHUNK_CELLS = 2_000_000
+BAND_COLUMNS = ['Minimum', 'Midpoint', 'Maximum', 'Overlap %', 'Mid Point Differential %']
+
+
+# ====================== PROYEKSI ======================
+def _mean_rates(mean, years, n_grades):
+    mean = np.asarray(mean, dtype=np.float64)
+    if mean.ndim == 1:
+        mean = mean[:, None]
+    return np.broadcast_to(mean, (years, n_grades))[:, None, :]
+
+
+def _rates(years, n_grades, draws, assumptions, seed):
+    # Per komponen: (rata-rata (years, 1, grade), guncangan (years, draws, 1) atau None).
+    # Guncangan acak dibagi bersama oleh semua grade dalam satu (tahun, draw), jadi cukup
+    # dibuat sekali lalu dipakai untuk setiap potongan grade.
+    assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    unknown = set(assumptions) - set(ASSUMPTIONS)
+    if unknown:
+        raise ValueError(f"Asumsi tidak dikenal: {sorted(unknown)}")
+    if not 0 <= draws <= MAX_DRAWS:
+        raise ValueError(f"Jumlah draw harus 0-{MAX_DRAWS:,}")
+    rng = np.random.default_rng(seed)
+    n_draws = max(draws, 1)
+    rates = []
+    for name in ASSUMPTIONS:
+        mean, std = assumptions[name]
+        shock = std * rng.standard_normal((years, n_draws, 1)) if draws and std else None
+        rates.append((_mean_rates(mean, years, n_grades), shock))
+    return rates, n_draws
+
+
+def _growth(rates, n_draws, cols):
+    years, _, n_grades = rates[0][0].shape
+    growth = np.ones((years, n_draws, len(range(n_grades)[cols])))
+    for mean, shock in rates:
+        rate = mean[..., cols]
+        if shock is not None:
+            rate = rate + shock
+        growth *= 1 + rate / 100
+    return np.cumprod(growth, axis=0)
+
+
+def growth_factors(years, n_grades, draws=0, assumptions=None, seed=None):
+    # Faktor kumulatif berbentuk (years, draws, grade); perbedaan antar grade datang dari
+    # rata-rata 2-D. draws=0 berarti deterministik (satu draw, standar deviasi diabaikan).
+    rates, n_draws = _rates(years, n_grades, draws, assumptions, seed)
+    return _growth(rates, n_draws, slice(None))
+
+
+def _project_slice(structure, rates, n_draws, lo, hi):
+    # Proyeksi grade [lo, hi). Overlap dan differential butuh grade sebelumnya, jadi grade
+    # lo-1 ikut dihitung lalu dibuang; hasilnya identik dengan menghitung semua grade sekaligus.
+    first = max(lo - 1, 0)
+    cols = slice(first, hi)
+    factor = _growth(rates, n_draws, cols)
+    factor = np.concatenate([np.ones((1,) + factor.shape[1:]), factor])
+    minimum = structure.minimum[cols] * factor
+    midpoint = structure.midpoint[cols] * factor
+    maximum = structure.maximum[cols] * factor
+    starts = structure.starts[cols]
+    overlap = utils.calculate_overlap(minimum, maximum)
+    overlap[..., starts] = 0.0
+    arrays = {
+        'Minimum': minimum,
+        'Midpoint': midpoint,
+        'Maximum': maximum,
+        'Overlap %': overlap,
+        'Mid Point Differential %': utils._differential(midpoint, starts),
+    }
+    return {name: values[..., lo - first:] for name, values in arrays.items()}
+
+
+def project_arrays(result_df, years=DEFAULT_YEARS, draws=0, assumptions=None, seed=None,
+                   structure_col=utils.STRUCTURE_ID_COLUMN):
+    # Proyeksikan hasil calculate_scenario_* (atau calculate_batch) dalam satu operasi array.
+    # Mengembalikan dict kolom -> array (years + 1, draws, grade); tahun 0 adalah struktur awal.
+    # Spread tetap, sehingga Minimum/Midpoint/Maximum bergerak dengan faktor yang sama dan
+    # Overlap % / Mid Point Differential % dihitung ulang dengan rumus utils.
+    # Semua draw disimpan; untuk tabel persentil gunakan project() yang memorinya terbatas.
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"Jumlah tahun harus 1-{MAX_YEARS}")
+    structure = utils.SalaryStructure.from_frame(result_df, structure_col=structure_col)
+    rates, n_draws = _rates(years, len(structure), draws, assumptions, seed)
+    return _project_slice(structure, rates, n_draws, 0, len(structure))
+
+
+def _band_values(arrays, percentiles):
+    # NaN differential hanya ada di awal struktur (semua draw), jadi percentile biasa cukup
+    q = np.asarray(percentiles, dtype=float)
+    return {name: np.percentile(arrays[name], q, axis=1) for name in BAND_COLUMNS}
+
+
+def _bands_frame(values, result_df, percentiles, structure_col):
+    # Tabel long-format: satu baris per (tahun, grade), kolom '<nama> P<persentil>' per kolom proyeksi
+    _, years, n = values['Midpoint'].shape
+    bands = pd.DataFrame({'Year': np.repeat(np.arange(years), n)})
+    if structure_col in result_df.columns:
+        bands[structure_col] = np.tile(result_df[structure_col].to_numpy(), years)
+    if 'Salary Grade' in result_df.columns:
+        bands['Salary Grade'] = np.tile(result_df['Salary Grade'].to_numpy(), years)
+    for name in BAND_COLUMNS:
+        for p, band in zip(percentiles, values[name]):
+            bands[f'{name} P{p:g}'] = band.reshape(-1)
+    return bands
+
+
+def percentile_bands(arrays, result_df, percentiles=DEFAULT_PERCENTILES, structure_col=utils.STRUCTURE_ID_COLUMN):
+    return _bands_frame(_band_values(arrays, percentiles), result_df, percentiles, structure_col)
+
+
+def project(result_df, years=DEFAULT_YEARS, draws=0, assumptions=None, percentiles=DEFAULT_PERCENTILES,
+            seed=None, structure_col=utils.STRUCTURE_ID_COLUMN):
+    # Grade diproses per potongan berisi paling banyak CHUNK_CELLS sel, dan hanya persentilnya
+    # yang disimpan. Persentil per (tahun, grade) diambil sepanjang draw, jadi memotong
+    # sepanjang grade tidak mengubah hasil.
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"Jumlah tahun harus 1-{MAX_YEARS}")
+    structure = utils.SalaryStructure.from_frame(result_df, structure_col=structure_col)
+    n = len(structure)
+    rates, n_draws = _rates(years, n, draws, assumptions, seed)
+    step = max(CHUNK_CELLS // ((years + 1) * n_draws), 1)
+    values = {name: np.empty((len(percentiles), years + 1, n)) for name in BAND_COLUMNS}
+    for lo in range(0, n, step):
+        hi = min(lo + step, n)
+        chunk = _band_values(_project_slice(structure, rates, n_draws, lo, hi), percentiles)
+        for name in BAND_COLUMNS:
+            values[name][..., lo:hi] = chunk[name]
+    return _bands_frame(values, result_df, percentiles, structure_col)
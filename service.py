@@ -0,0 +1,446 @@
+"""Local HTTP service for the salary structure calculators (asyncio, stdlib only).
+
+Contoh:
+    python service.py --port 8765 --workers 4
+    curl -X POST 'http://127.0.0.1:8765/calculate/2?lowest_midpoint=20000&highest_midpoint=100000' \\
+         -H 'Content-Type: application/json' -d '[{"Salary Grade": "A", "Spread %": 30}, ...]'
+    curl http://127.0.0.1:8765/metrics
+
+Endpoint:
+    POST /calculate/<skenario>  body JSON (list record, atau {"rows": [...], "params": {...}})
+                                atau Arrow IPC (Content-Type application/vnd.apache.arrow.file/stream).
+                                Parameter skenario lewat query string atau "params" di body JSON.
+                                Respons Arrow jika header Accept meminta Arrow, selain itu JSON.
+    GET  /metrics               Latensi (p50/p95/p99), throughput, ukuran batch, antrean.
+    GET  /health
+
+Request yang datang bersamaan dikumpulkan (micro-batch) lalu dihitung sebagai satu tabel
+long-format lewat utils.calculate_batch di worker pool. Decode, validasi, perhitungan dan
+encode respons semuanya terjadi di worker sehingga event loop hanya memindahkan byte.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+# ====================== KONSTANTA ======================
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_BODY = 64 * 1024 ** 2
+LATENCY_WINDOW = 10_000
+JSON_TYPE = 'application/json'
+ARROW_TYPES = ('application/vnd.apache.arrow.file', 'application/vnd.apache.arrow.stream')
+# Parameter numerik per skenario yang boleh dikirim lewat HTTP
+REQUEST_PARAMS = {
+    1: [],
+    2: ['lowest_midpoint', 'highest_midpoint'],
+    3: ['lowest_midpoint'],
+    4: [],
+    5: ['target_percentile'],
+}
+
+
+class RequestError(ValueError):
+    def __init__(self, status, payload):
+        super().__init__(payload)
+        self.status = status
+        self.payload = payload
+
+
+# ====================== DECODE / ENCODE (WORKER) ======================
+def _read_arrow(body):
+    import pyarrow as pa
+    try:
+        return pa.ipc.open_file(pa.BufferReader(body)).read_all().to_pandas()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(pa.BufferReader(body)).read_all().to_pandas()
+
+
+def decode_request(scenario, query, body, content_type):
+    # -> (DataFrame input, params). Melempar RequestError untuk input yang tidak valid.
+    if scenario not in REQUEST_PARAMS:
+        raise RequestError(404, {'error': f"Skenario tidak dikenal: {scenario}"})
+    params = dict(query)
+    if content_type in ARROW_TYPES:
+        try:
+            df = _read_arrow(body)
+        except ImportError:
+            raise RequestError(415, {'error': "Body Arrow membutuhkan pyarrow di server"})
+        except Exception as e:
+            raise RequestError(400, {'error': f"Body Arrow tidak valid: {e}"})
+    else:
+        try:
+            payload = json.loads(body or b'[]')
+        except ValueError as e:
+            raise RequestError(400, {'error': f"Body JSON tidak valid: {e}"})
+        if isinstance(payload, dict):
+            params.update(payload.get('params', {}))
+            payload = payload.get('rows', [])
+        if not isinstance(payload, list):
+            raise RequestError(400, {'error': "Body JSON harus list record atau {'rows': [...]}"})
+        df = pd.DataFrame.from_records(payload)
+
+    unknown = set(params) - set(REQUEST_PARAMS[scenario])
+    missing = set(REQUEST_PARAMS[scenario]) - set(params)
+    if unknown or missing:
+        raise RequestError(400, {'error': "Parameter tidak sesuai", 'unknown': sorted(unknown),
+                                 'missing': sorted(missing)})
+    try:
+        params = {name: float(value) for name, value in params.items()}
+    except (TypeError, ValueError):
+        raise RequestError(400, {'error': "Parameter harus berupa angka"})
+    errors = utils.validate(df, scenario, params)
+    if len(errors):
+        raise RequestError(422, {'error': "Validasi gagal", 'errors': errors.to_dict(orient='records')})
+    return df, params
+
+
+def encode_response(df, accept):
+    if any(t in accept for t in ARROW_TYPES):
+        import export
+        return ARROW_TYPES[0], export.to_arrow(df)
+    return JSON_TYPE, df.to_json(orient='records').encode()
+
+
+def _error(status, payload):
+    return status, JSON_TYPE, json.dumps(payload, default=str).encode(), 0
+
+
+def _calculate_group(scenario, decoded):
+    # Satu tabel long-format untuk semua request skenario ini: Structure ID = posisi request,
+    # parameter menjadi array per struktur (urutan kemunculan = urutan request). Hasil per
+    # request diambil kembali dengan slice baris dan dipasang ke input request itu sendiri,
+    # persis seperti calculate_scenario_* (dtype kolom input tidak ikut berubah oleh concat).
+    sizes = np.array([len(df) for df, _ in decoded])
+    long = pd.concat([df for df, _ in decoded], ignore_index=True)
+    long[utils.STRUCTURE_ID_COLUMN] = np.repeat(np.arange(len(decoded)), sizes)
+    params = {name: np.array([p[name] for _, p in decoded]) for name in REQUEST_PARAMS[scenario]}
+    result = utils.calculate_batch(long, scenario, **params)
+    outputs = utils.SCENARIO_OUTPUTS[scenario]
+    ends = np.cumsum(sizes)
+    arrays = {name: result[name].to_numpy() for name in outputs}
+    return [utils._merge_frame(df, {name: values[end - len(df):end] for name, values in arrays.items()})
+            for (df, _), end in zip(decoded, ends)]
+
+
+def _calculate_single(scenario, df, params):
+    if utils.STRUCTURE_ID_COLUMN in df.columns:
+        return utils.calculate_batch(df, scenario, **params)
+    return utils.calculate_scenario(df, scenario, **params)
+
+
+def process_batch(items):
+    # Dijalankan di worker. items: list (scenario, query, body, content_type, accept).
+    # Mengembalikan list (status, content_type, body, rows) dengan urutan yang sama.
+    responses = [None] * len(items)
+    groups = collections.defaultdict(list)
+    for i, (scenario, query, body, content_type, accept) in enumerate(items):
+        try:
+            df, params = decode_request(scenario, query, body, content_type)
+        except RequestError as e:
+            responses[i] = _error(e.status, e.payload)
+            continue
+        except Exception as e:
+            # Body dengan bentuk tak terduga (misalnya list angka atau params bukan objek) hanya
+            # menggagalkan request itu sendiri, bukan seluruh batch
+            responses[i] = _error(400, {'error': f"Request tidak valid: {e}"})
+            continue
+        if len(df) == 0 or utils.STRUCTURE_ID_COLUMN in df.columns:
+            # Input kosong atau yang sudah berupa batch dihitung sendiri
+            try:
+                responses[i] = (200, *encode_response(_calculate_single(scenario, df, params), accept), len(df))
+            except Exception as e:
+                responses[i] = _error(500, {'error': str(e)})
+            continue
+        groups[scenario].append((i, df, params))
+
+    for scenario, members in groups.items():
+        decoded = [(df, params) for _, df, params in members]
+        try:
+            results = _calculate_group(scenario, decoded)
+        except Exception:
+            # Satu request bermasalah tidak boleh menggagalkan request lain di batch yang sama
+            results = []
+            for df, params in decoded:
+                try:
+                    results.append(_calculate_single(scenario, df, params))
+                except Exception as e:
+                    results.append(e)
+        for (i, df, _), result in zip(members, results):
+            if isinstance(result, Exception):
+                responses[i] = _error(500, {'error': str(result)})
+            else:
+                responses[i] = (200, *encode_response(result, items[i][4]), len(df))
+    return responses
+
+
+# ====================== METRIK ======================
+class Metrics:
+    # Dicatat di event loop saja, jadi tidak butuh lock
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.finished = collections.deque(maxlen=LATENCY_WINDOW)
+        self.status = collections.Counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_batch = 0
+
+    def record(self, latency, status, rows):
+        self.requests += 1
+        self.rows += rows
+        self.status[status] += 1
+        self.latencies.append(latency)
+        self.finished.append(time.monotonic())
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_requests += size
+        self.max_batch = max(self.max_batch, size)
+
+    def snapshot(self, queue_depth=0, in_flight=0):
+        now = time.monotonic()
+        latencies = np.fromiter(self.latencies, dtype=float)
+        recent = np.fromiter(self.finished, dtype=float)
+        window = now - recent[0] if len(recent) else 0.0
+        pct = np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies) else [None] * 3
+        return {
+            'uptime_s': now - self.started,
+            'requests': self.requests,
+            'rows': self.rows,
+            'status': {str(k): v for k, v in sorted(self.status.items())},
+            'latency_ms': {'p50': pct[0], 'p95': pct[1], 'p99': pct[2],
+                           'mean': float(latencies.mean() * 1000) if len(latencies) else None},
+            'throughput_rps': len(recent) / window if window > 0 else 0.0,
+            'batches': self.batches,
+            'avg_batch': self.batched_requests / self.batches if self.batches else 0.0,
+            'max_batch': self.max_batch,
+            'queue_depth': queue_depth,
+            'in_flight_batches': in_flight,
+        }
+
+
+# ====================== SERVER ======================
+class Service:
+    def __init__(self, workers=None, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY,
+                 max_body=DEFAULT_MAX_BODY):
+        # workers=0 memakai satu thread di proses ini (tetap di luar event loop)
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self.queue = None
+        self.pool = None
+        self.slots = None
+        self.in_flight = 0
+        self.batcher = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        if self.workers == 0:
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.queue = asyncio.Queue()
+        # Batch yang sedang dihitung dibatasi; selama worker sibuk, request menumpuk di antrean
+        # dan otomatis membentuk batch yang lebih besar
+        self.slots = asyncio.Semaphore(2 * max(self.workers, 1))
+        self.batcher = asyncio.create_task(self._batch_loop())
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self, wait=False):
+        if self.batcher is not None:
+            self.batcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=wait, cancel_futures=True)
+
+    async def submit(self, scenario, query, body, content_type, accept):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((scenario, query, body, content_type, accept), future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            self.metrics.record_batch(len(batch))
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        self.in_flight += 1
+        try:
+            items = [item for item, _ in batch]
+            responses = await asyncio.get_running_loop().run_in_executor(self.pool, process_batch, items)
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(_error(500, {'error': str(e)}))
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader, self.max_body)
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                start = time.perf_counter()
+                status, content_type, payload, rows = await self._route(method, target, headers, body)
+                writer.write(_response(status, content_type, payload, keep_alive))
+                await writer.drain()
+                if urlsplit(target).path.startswith('/calculate'):
+                    self.metrics.record(time.perf_counter() - start, status, rows)
+                if not keep_alive:
+                    break
+        except RequestError as e:
+            writer.write(_response(e.status, JSON_TYPE, json.dumps(e.payload).encode(), False))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        parts = url.path.strip('/').split('/')
+        if method == 'GET' and url.path == '/health':
+            return 200, JSON_TYPE, b'{"status": "ok"}', 0
+        if method == 'GET' and url.path == '/metrics':
+            snapshot = self.metrics.snapshot(self.queue.qsize(), self.in_flight)
+            return 200, JSON_TYPE, json.dumps(snapshot).encode(), 0
+        if parts[0] == 'calculate' and len(parts) == 2:
+            if method != 'POST':
+                return _error(405, {'error': "Gunakan POST"})
+            try:
+                scenario = int(parts[1])
+            except ValueError:
+                return _error(404, {'error': f"Skenario tidak dikenal: {parts[1]}"})
+            content_type = headers.get('content-type', JSON_TYPE).split(';')[0].strip()
+            return await self.submit(scenario, parse_qsl(url.query), body, content_type,
+                                     headers.get('accept', JSON_TYPE))
+        return _error(404, {'error': f"Endpoint tidak dikenal: {url.path}"})
+
+
+# ====================== HTTP ======================
+async def _read_request(reader, max_body):
+    # HTTP/1.1 minimal: request line + header + body Content-Length (tanpa chunked encoding)
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise RequestError(400, {'error': "Request tidak lengkap"})
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError(431, {'error': "Header terlalu besar"})
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise RequestError(400, {'error': "Request line tidak valid"})
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise RequestError(411, {'error': "Gunakan Content-Length, bukan chunked encoding"})
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RequestError(400, {'error': "Content-Length tidak valid"})
+    if length < 0:
+        raise RequestError(400, {'error': "Content-Length tidak valid"})
+    if length > max_body:
+        raise RequestError(413, {'error': f"Body lebih dari {max_body} byte"})
+    body = await reader.readexactly(length) if length else b''
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return method, target, headers, body, keep_alive
+
+
+def _response(status, content_type, body, keep_alive):
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+# ====================== MAIN ======================
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    # SIGTERM (misalnya dari loadtest --spawn) dan SIGINT menghentikan server dengan rapi: pool
+    # worker ditutup dan ditunggu, sehingga tidak ada proses worker yatim yang menahan stdout
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows / bukan thread utama: hanya KeyboardInterrupt
+    service = Service(**options)
+    server = await service.start(host, port)
+    print(f"Melayani di http://{host}:{port} ({service.workers} worker)", file=sys.stderr)
+    try:
+        async with server:
+            await stop
+    finally:
+        service.close(wait=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Salary Structure Calculator (HTTP service)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Jumlah proses worker (default: jumlah CPU, 0 = thread di proses ini)")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="Request maksimum per batch")
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help="Waktu tunggu maksimum untuk mengisi batch (ms)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, max_batch=args.max_batch,
+                          max_delay=args.max_delay_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
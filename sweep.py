@@ -0,0 +1,139 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+# ====================== KONSTANTA ======================
+# Parameter yang boleh di-sweep per skenario. 'spread' menimpa kolom Spread % secara seragam.
+SWEEP_PARAMS = {
+    1: [],
+    2: ['lowest_midpoint', 'highest_midpoint', 'spread'],
+    3: ['lowest_midpoint', 'spread'],
+    4: ['spread'],
+    5: ['target_percentile', 'spread'],
+}
+METRICS = ['avg_overlap', 'max_overlap', 'total_range', 'avg_spread', 'max_differential', 'avg_midpoint']
+DEFAULT_CHUNK_SIZE = 2000
+
+
+# ====================== GENERATOR PARAMETER ======================
+def grid_points(grid):
+    # Cartesian product dari {nama: [nilai, ...]}, dihasilkan satu per satu (tanpa materialisasi)
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def grid_size(grid):
+    size = 1
+    for values in grid.values():
+        size *= len(values)
+    return size
+
+
+def sample_points(space, n, seed=None):
+    # Sampel acak: nilai (lo, hi) berupa tuple diambil uniform, list diambil secara acak
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        point = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple):
+                point[name] = float(rng.uniform(spec[0], spec[1]))
+            else:
+                point[name] = spec[rng.integers(len(spec))]
+        yield point
+
+
+def _chunks(points, chunk_size):
+    points = iter(points)
+    while True:
+        chunk = list(itertools.islice(points, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ====================== EVALUASI ======================
+def evaluate_chunk(df_input, scenario, points):
+    # Ubah satu chunk titik parameter menjadi satu tabel long-format lalu hitung lewat calculate_structure
+    k, n = len(points), len(df_input)
+    names = list(points[0]) if points else []
+    unknown = set(names) - set(SWEEP_PARAMS[scenario])
+    if unknown:
+        raise ValueError(f"Parameter tidak bisa di-sweep untuk skenario {scenario}: {sorted(unknown)}")
+    values = {name: np.array([p[name] for p in points], dtype=float) for name in names}
+
+    long = pd.DataFrame({col: np.tile(df_input[col].to_numpy(), k)
+                         for col in df_input.columns if col != utils.STRUCTURE_ID_COLUMN})
+    long[utils.STRUCTURE_ID_COLUMN] = np.repeat(np.arange(k), n)
+    if 'spread' in values:
+        long['Spread %'] = np.repeat(values['spread'], n)
+    params = {name: v for name, v in values.items() if name != 'spread'}
+    structure = utils.calculate_structure(long, scenario, structure_col=utils.STRUCTURE_ID_COLUMN,
+                                          with_grades=False, **params)
+
+    starts = structure.offsets
+    summary = pd.DataFrame(values)
+    summary['avg_overlap'] = np.add.reduceat(structure.overlap, starts) / n
+    summary['max_overlap'] = np.maximum.reduceat(structure.overlap, starts)
+    summary['total_range'] = np.add.reduceat(structure.range, starts)
+    summary['avg_spread'] = np.add.reduceat(structure.spread, starts) / n
+    summary['max_differential'] = np.fmax.reduceat(_differential_column(long, structure, scenario), starts)
+    summary['avg_midpoint'] = np.add.reduceat(structure.midpoint, starts) / n
+    return summary
+
+
+def _differential_column(long, structure, scenario):
+    # Skenario 3 memakai Mid Point Differential % dari input, skenario lain dari hasil
+    if scenario == 3:
+        return long['Midpoint Differential %'].to_numpy(dtype=float)
+    return structure.differential
+
+
+def iter_sweep(df_input, scenario, points, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    # Stream ringkasan per chunk. max_workers=0 menjalankan di proses ini (tanpa process pool).
+    # Jumlah chunk yang sedang diproses dibatasi agar memori tetap terbatas untuk grid besar.
+    if len(df_input) == 0:
+        return
+    df = df_input.reset_index(drop=True)
+    chunks = _chunks(points, chunk_size)
+    if max_workers == 0:
+        for chunk in chunks:
+            yield evaluate_chunk(df, scenario, chunk)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = []
+        for chunk in itertools.islice(chunks, 2 * max_workers):
+            pending.append(pool.submit(evaluate_chunk, df, scenario, chunk))
+        while pending:
+            summary = pending.pop(0).result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.submit(evaluate_chunk, df, scenario, chunk))
+            yield summary
+
+
+def run_sweep(df_input, scenario, points, rank_by='avg_overlap', ascending=True, top_k=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    # Kumpulkan ringkasan dan urutkan berdasarkan metrik. Dengan top_k, hanya k baris terbaik
+    # yang disimpan di antara chunk sehingga memori tidak bergantung pada ukuran grid.
+    if rank_by not in METRICS:
+        raise ValueError(f"Metrik tidak dikenal: {rank_by}")
+    kept = []
+    for summary in iter_sweep(df_input, scenario, points, chunk_size=chunk_size, max_workers=max_workers):
+        kept.append(summary)
+        if top_k is not None:
+            merged = pd.concat(kept, ignore_index=True)
+            kept = [merged.sort_values(rank_by, ascending=ascending, kind='stable').head(top_k)]
+    if not kept:
+        return pd.DataFrame(columns=METRICS)
+    result = pd.concat(kept, ignore_index=True).sort_values(rank_by, ascending=ascending, kind='stable')
+    if top_k is not None:
+        result = result.head(top_k)
+    return result.reset_index(drop=True)
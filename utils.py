@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
+
+import perf
 
 # ====================== KONSTANTA ======================
 PERCENTILE_FACTORS = {10: 0.70, 25: 0.85, 50: 1.00, 60: 1.08, 75: 1.18, 90: 1.35, 95: 1.50}
@@ -8,80 +9,686 @@ DEFAULT_GRADE_NAMES = ['CXO', 'Sr Vice President', 'Vice President', 'Sr Directo
                        'Sr Manager', 'Principal', 'Manager IC', 'Sr Analyst', 'Analyst']
 
 # ====================== FUNGSI HELPER ======================
+@perf.timed()
 def calculate_overlap(min_series, max_series):
-    overlap = [0]
-    for i in range(1, len(min_series)):
-        prev_max = max_series.iloc[i-1]
-        prev_min = min_series.iloc[i-1]
-        curr_min = min_series.iloc[i]
-        if prev_max > curr_min and (prev_max - prev_min) > 0:
-            ov = (prev_max - curr_min) / (prev_max - prev_min) * 100
-        else:
-            ov = 0
-        overlap.append(ov)
+    # Overlap grade i terhadap grade i-1, dihitung dengan array yang digeser satu posisi.
+    # Array berdimensi lebih dari satu diproses sepanjang sumbu terakhir (grade).
+    mins = np.asarray(min_series, dtype=float)
+    maxs = np.asarray(max_series, dtype=float)
+    overlap = np.zeros(mins.shape)
+    if mins.shape[-1] < 2:
+        return overlap
+    prev_min, prev_max, curr_min = mins[..., :-1], maxs[..., :-1], mins[..., 1:]
+    prev_range = prev_max - prev_min
+    valid = (prev_max > curr_min) & (prev_range > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overlap[..., 1:] = np.where(valid, (prev_max - curr_min) / prev_range * 100, 0.0)
     return overlap
 
+def calculate_midpoint_progression(differentials, lowest_midpoint):
+    # Midpoint grade i = lowest_midpoint * prod(1 + diff_j / 100) untuk j = 1..i.
+    # np.cumprod mengalikan berurutan dari kiri, sama seperti loop lama, sehingga
+    # hasilnya identik bit-per-bit (toleransi 0, bukan hanya rtol=1e-12).
+    # Jika lowest_midpoint berupa array berisi k nilai, hasilnya berbentuk (n, k):
+    # satu kolom per anchor, berguna untuk sensitivity sweep.
+    diffs = np.asarray(differentials, dtype=float)
+    anchors = np.asarray(lowest_midpoint, dtype=float)
+    n = len(diffs)
+    if n == 0:
+        return np.zeros((0,) + anchors.shape)
+    factors = np.empty((n,) + anchors.shape)
+    factors[0] = anchors
+    factors[1:] = (1 + diffs[1:] / 100).reshape((n - 1,) + (1,) * anchors.ndim)
+    return np.cumprod(factors, axis=0)
+
+# ====================== TEMPLATE ======================
+def template_frame(scenario, num_grades):
+    if scenario == 1:
+        data = {
+            'Salary Grade': DEFAULT_GRADE_NAMES[:num_grades],
+            'Minimum': [50000 + i*10000 for i in range(num_grades)],
+            'Maximum': [70000 + i*14000 for i in range(num_grades)]
+        }
+    elif scenario == 2:
+        data = {
+            'Salary Grade': DEFAULT_GRADE_NAMES[:num_grades],
+            'Spread %': [30] * num_grades
+        }
+    elif scenario == 3:
+        data = {
+            'Salary Grade': DEFAULT_GRADE_NAMES[:num_grades],
+            'Midpoint Differential %': [0] + [10] * (num_grades - 1),
+            'Spread %': [30] * num_grades
+        }
+    elif scenario == 4:
+        base = 50000
+        data = {
+            'Salary Grade': DEFAULT_GRADE_NAMES[:num_grades],
+            'Midpoint': [base * (1.1 ** i) for i in range(num_grades)],
+            'Spread %': [30] * num_grades
+        }
+    elif scenario == 5:
+        base = 50000
+        data = {
+            'Salary Grade': DEFAULT_GRADE_NAMES[:num_grades],
+            'Market Rate': [base * (1.1 ** i) for i in range(num_grades)],
+            'Spread %': [30] * num_grades
+        }
+    else:
+        raise ValueError(f"Skenario tidak dikenal: {scenario}")
+    return pd.DataFrame(data)
+
 # ====================== FUNGSI VALIDASI ======================
-def validate_scenario_1(df):
+REQUIRED_COLUMNS = {
+    1: ['Minimum', 'Maximum'],
+    2: ['Spread %'],
+    3: ['Midpoint Differential %', 'Spread %'],
+    4: ['Midpoint', 'Spread %'],
+    5: ['Market Rate', 'Spread %'],
+}
+POSITIVE_COLUMNS = {1: ['Minimum', 'Maximum'], 4: ['Midpoint'], 5: ['Market Rate']}
+MONOTONIC_COLUMNS = {4: 'Midpoint', 5: 'Market Rate'}
+SPREAD_BOUNDS = (0, 200)
+VALIDATION_COLUMNS = ['Row', 'Column', 'Check', 'Message']
+
+
+def _error_rows(df, mask, column, check, template):
+    # Satu baris error per True di mask; template diformat dengan nomor grade (index + 1).
+    # None jika tidak ada error, agar input yang bersih tidak membangun DataFrame kosong.
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return None
+    labels = df.index[mask]
+    before, after = template.split('{grade}')
+    return pd.DataFrame({
+        'Row': labels,
+        'Column': column,
+        'Check': check,
+        'Message': before + pd.Series(labels + 1, dtype=object).astype(str).to_numpy(dtype=object) + after,
+    })
+
+
+def _previous_rows(df):
+    # Posisi baris sebelumnya dalam struktur yang sama (-1 untuk grade pertama). Dengan kolom
+    # Structure ID, baris dikelompokkan per ID seperti calculate_batch (urutan stabil).
+    n = len(df)
+    previous = np.arange(-1, n - 1)
+    if STRUCTURE_ID_COLUMN not in df.columns or n == 0:
+        return previous
+    codes, _ = pd.factorize(df[STRUCTURE_ID_COLUMN], sort=False, use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    same = codes[order[1:]] == codes[order[:-1]]
+    previous = np.full(n, -1)
+    previous[order[1:]] = np.where(same, order[:-1], -1)
+    return previous
+
+
+def _decreasing(values, previous):
+    # True untuk baris yang nilainya lebih kecil dari baris sebelumnya di struktur yang sama
+    has_previous = previous >= 0
+    return has_previous & (values < values[np.where(has_previous, previous, 0)])
+
+
+def _error_row(column, check, message):
+    return pd.DataFrame({'Row': [None], 'Column': [column], 'Check': [check], 'Message': [message]})
+
+
+@perf.timed()
+def validate(df, scenario, params=None):
+    # Validasi tervektorisasi untuk semua skenario. Mengembalikan tabel error
+    # (Row, Column, Check, Message); tabel kosong berarti input valid. Input dengan kolom
+    # Structure ID divalidasi per struktur (cek urutan dan grade pertama di-reset per ID).
+    params = params or {}
     errors = []
-    for idx, row in df.iterrows():
-        if row['Minimum'] >= row['Maximum']:
-            errors.append(f"Grade {idx+1}: Minimum harus lebih kecil dari Maximum")
-    return errors
+    previous = _previous_rows(df)
+    first = previous < 0
+    if STRUCTURE_ID_COLUMN in df.columns:
+        errors.append(_error_rows(df, df[STRUCTURE_ID_COLUMN].isna().to_numpy(), STRUCTURE_ID_COLUMN,
+                                  'missing_value', f"Grade {{grade}}: {STRUCTURE_ID_COLUMN} kosong"))
+    market_data = params.get('market_data') if scenario == 5 else None
+    required = ['Salary Grade', 'Spread %'] if market_data is not None else REQUIRED_COLUMNS[scenario]
+    missing = [col for col in required if col not in df.columns]
+    for col in missing:
+        errors.append(_error_row(col, 'missing_column', f"Kolom '{col}' tidak ditemukan"))
+
+    numeric = {}
+    for col in required:
+        if col in missing or col == 'Salary Grade':
+            continue
+        raw = df[col]
+        values = pd.to_numeric(raw, errors='coerce') if raw.dtype.kind not in 'fiu' else raw
+        nan = values.isna().to_numpy()
+        bad_type = nan & raw.notna().to_numpy()
+        errors.append(_error_rows(df, bad_type, col, 'dtype', f"Grade {{grade}}: {col} harus berupa angka"))
+        first_row_diff = scenario == 3 and col == 'Midpoint Differential %'
+        empty = nan & ~bad_type
+        if first_row_diff:
+            empty &= ~first  # differential grade pertama tiap struktur tidak dipakai
+        errors.append(_error_rows(df, empty, col, 'missing_value', f"Grade {{grade}}: {col} kosong"))
+        numeric[col] = values.to_numpy(dtype=float)
+
+    with np.errstate(invalid='ignore'):
+        for col in POSITIVE_COLUMNS.get(scenario, []):
+            if col in numeric:
+                errors.append(_error_rows(df, numeric[col] <= 0, col, 'non_positive',
+                                          f"Grade {{grade}}: {col} harus lebih besar dari 0"))
+        if 'Spread %' in numeric:
+            lo, hi = SPREAD_BOUNDS
+            spread = numeric['Spread %']
+            errors.append(_error_rows(df, (spread <= lo) | (spread >= hi), 'Spread %', 'spread_bounds',
+                                      f"Grade {{grade}}: Spread % harus di antara {lo} dan {hi}"))
+        if scenario == 1 and 'Minimum' in numeric and 'Maximum' in numeric:
+            errors.append(_error_rows(df, numeric['Minimum'] >= numeric['Maximum'], 'Minimum', 'min_max',
+                                      "Grade {grade}: Minimum harus lebih kecil dari Maximum"))
+            midpoint = (numeric['Minimum'] + numeric['Maximum']) / 2
+            errors.append(_error_rows(df, _decreasing(midpoint, previous), 'Midpoint', 'monotonic',
+                                      "Grade {grade}: Midpoint lebih kecil dari grade sebelumnya"))
+        col = MONOTONIC_COLUMNS.get(scenario)
+        if col in numeric:
+            values = numeric[col]
+            errors.append(_error_rows(df, _decreasing(values, previous), col, 'monotonic',
+                                      f"Grade {{grade}}: {col} lebih kecil dari grade sebelumnya"))
+        if scenario == 3 and 'Midpoint Differential %' in numeric:
+            diff = numeric['Midpoint Differential %']
+            negative = (diff < 0) & ~first
+            errors.append(_error_rows(df, negative, 'Midpoint Differential %', 'monotonic',
+                                      "Grade {grade}: Midpoint Differential % tidak boleh negatif"))
+
+    if market_data is not None and 'Salary Grade' not in missing:
+        unknown = market_data.grades.get_indexer(pd.Index(df['Salary Grade'].to_numpy(dtype=object))) < 0
+        errors.append(_error_rows(df, unknown, 'Salary Grade', 'unknown_grade',
+                                  "Grade {grade}: tidak ada data survei untuk grade ini"))
+
+    if scenario in (2, 3) and params.get('lowest_midpoint') is not None and params['lowest_midpoint'] <= 0:
+        errors.append(_error_row('lowest_midpoint', 'non_positive', "Lowest Midpoint harus lebih besar dari 0"))
+    if scenario == 2 and params.get('highest_midpoint') is not None and params.get('lowest_midpoint') is not None:
+        if params['highest_midpoint'] < params['lowest_midpoint']:
+            errors.append(_error_row('highest_midpoint', 'min_max',
+                                     "Highest Midpoint harus lebih besar dari Lowest Midpoint"))
+
+    errors = [e for e in errors if e is not None]
+    if not errors:
+        return pd.DataFrame(columns=VALIDATION_COLUMNS)
+    return pd.concat(errors, ignore_index=True)
+
+
+def validate_scenario_1(df):
+    mask = df['Minimum'].to_numpy() >= df['Maximum'].to_numpy()
+    return [f"Grade {idx+1}: Minimum harus lebih kecil dari Maximum" for idx in df.index[mask]]
+
+# ====================== STRUKTUR KOMPAK ======================
+STRUCTURE_ID_COLUMN = 'Structure ID'
+SCENARIO_OUTPUTS = {
+    1: ['Midpoint', 'Spread %', 'Range', 'Mid Point Differential %', 'Overlap %'],
+    2: ['Midpoint', 'Minimum', 'Maximum', 'Range', 'Mid Point Differential %', 'Overlap %'],
+    3: ['Midpoint', 'Minimum', 'Maximum', 'Range', 'Overlap %'],
+    4: ['Minimum', 'Maximum', 'Range', 'Mid Point Differential %', 'Overlap %'],
+    5: ['Midpoint', 'Minimum', 'Maximum', 'Range', 'Mid Point Differential %', 'Overlap %'],
+}
+BATCH_OUTPUTS = ['Minimum', 'Midpoint', 'Maximum', 'Spread %', 'Range', 'Overlap %', 'Mid Point Differential %']
+
+
+def encode_grades(values, grade_names=None):
+    # Kode int32 ke tabel nama grade bersama; nama baru ditambahkan ke grade_names (in place)
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    if grade_names is None:
+        grade_names = []
+    index = {name: i for i, name in enumerate(grade_names)}
+    mapping = np.empty(len(uniques), dtype=np.int32)
+    for j, name in enumerate(uniques):
+        if name not in index:
+            index[name] = len(grade_names)
+            grade_names.append(name)
+        mapping[j] = index[name]
+    return mapping[codes], grade_names
+
+
+def _differential(midpoint, starts):
+    # Sama dengan Series.pct_change() * 100, di-reset (NaN) di awal setiap struktur.
+    # Seperti calculate_overlap, array N-D diproses sepanjang sumbu terakhir.
+    diff = np.full(midpoint.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff[..., 1:] = (midpoint[..., 1:] / midpoint[..., :-1] - 1) * 100
+    diff[..., starts] = np.nan
+    return diff
+
+
+class SalaryStructure:
+    # Hasil perhitungan dalam bentuk kompak: array float64 untuk min/mid/max/spread, kode
+    # grade int32 yang merujuk ke tabel nama grade bersama, dan offsets awal tiap struktur
+    # sehingga satu objek bisa memuat banyak struktur berurutan. DataFrame hanya dibuat
+    # di tepi I/O lewat from_frame/to_frame.
+    __slots__ = ('minimum', 'midpoint', 'maximum', 'spread', 'differential', 'overlap',
+                 'grade_codes', 'grade_names', 'offsets')
+
+    def __init__(self, minimum, midpoint, maximum, spread, grade_codes=None, grade_names=None, offsets=None):
+        self.minimum = np.asarray(minimum, dtype=np.float64)
+        self.midpoint = np.asarray(midpoint, dtype=np.float64)
+        self.maximum = np.asarray(maximum, dtype=np.float64)
+        self.spread = np.asarray(spread, dtype=np.float64)
+        self.grade_codes = None if grade_codes is None else np.asarray(grade_codes, dtype=np.int32)
+        self.grade_names = grade_names
+        if offsets is None:
+            offsets = [0] if len(self.midpoint) else []
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        starts = self.starts
+        self.differential = _differential(self.midpoint, starts)
+        self.overlap = calculate_overlap(self.minimum, self.maximum)
+        self.overlap[starts] = 0.0
+
+    def __len__(self):
+        return len(self.midpoint)
+
+    @property
+    def starts(self):
+        mask = np.zeros(len(self.midpoint), dtype=bool)
+        mask[self.offsets] = True
+        return mask
+
+    @property
+    def sizes(self):
+        return np.diff(np.append(self.offsets, len(self.midpoint)))
+
+    @property
+    def n_structures(self):
+        return len(self.offsets)
+
+    @property
+    def range(self):
+        return self.maximum - self.minimum
+
+    @property
+    def nbytes(self):
+        arrays = [self.minimum, self.midpoint, self.maximum, self.spread, self.differential,
+                  self.overlap, self.offsets]
+        if self.grade_codes is not None:
+            arrays.append(self.grade_codes)
+        return sum(a.nbytes for a in arrays)
+
+    def grades(self):
+        if self.grade_codes is None:
+            return None
+        return np.asarray(self.grade_names, dtype=object)[self.grade_codes]
+
+    def columns(self):
+        return {
+            'Minimum': self.minimum,
+            'Midpoint': self.midpoint,
+            'Maximum': self.maximum,
+            'Spread %': self.spread,
+            'Range': self.range,
+            'Mid Point Differential %': self.differential,
+            'Overlap %': self.overlap,
+        }
+
+    @classmethod
+    def from_frame(cls, df, grade_names=None, structure_col=None):
+        # Dari tabel hasil yang sudah berisi Minimum/Midpoint/Maximum (baris per struktur berurutan)
+        minimum = df['Minimum'].to_numpy(dtype=np.float64)
+        maximum = df['Maximum'].to_numpy(dtype=np.float64)
+        if 'Midpoint' in df.columns:
+            midpoint = df['Midpoint'].to_numpy(dtype=np.float64)
+        else:
+            midpoint = (minimum + maximum) / 2
+        if 'Spread %' in df.columns:
+            spread = df['Spread %'].to_numpy(dtype=np.float64)
+        else:
+            spread = (maximum - minimum) / midpoint * 100
+        codes = None
+        if 'Salary Grade' in df.columns:
+            codes, grade_names = encode_grades(df['Salary Grade'], grade_names)
+        offsets = None
+        if structure_col is not None and structure_col in df.columns:
+            ids = df[structure_col].to_numpy()
+            offsets = np.flatnonzero(np.append(True, ids[1:] != ids[:-1])) if len(ids) else []
+        return cls(minimum, midpoint, maximum, spread, codes, grade_names, offsets)
+
+    def to_frame(self, base=None, columns=None):
+        # Tanpa base: tabel baru berisi grade (dan Structure ID jika >1 struktur) plus kolom hasil.
+        # Dengan base: kolom base dipertahankan dan kolom hasil ditimpa/ditambahkan di akhir,
+        # sama seperti df[kolom] = ... pada salinan base.
+        values = self.columns()
+        columns = list(values) if columns is None else columns
+        if base is not None:
+            return _merge_frame(base, {name: values[name] for name in columns})
+        data = {}
+        if self.n_structures > 1:
+            data[STRUCTURE_ID_COLUMN] = np.repeat(np.arange(self.n_structures), self.sizes)
+        if self.grade_codes is not None:
+            data['Salary Grade'] = self.grades()
+        data.update((name, values[name]) for name in columns)
+        return pd.DataFrame(data)
+
+
+def _merge_frame(base, values):
+    # Salinan dangkal: kolom input tidak disalin, kolom hasil dipasang langsung dari array
+    df = base.copy(deep=False)
+    for name, array in values.items():
+        df[name] = array
+    return df
+
 
 # ====================== FUNGSI PERHITUNGAN ======================
+def _build_structure(df, scenario, params, offsets=None, order=None, structure_index=None, grade_names=None,
+                     with_grades=True):
+    # Inti semua skenario: bekerja pada array float64 dan menghasilkan SalaryStructure.
+    # params berisi skalar (satu struktur) atau array per baris (batch).
+    n = len(df)
+    if offsets is None:
+        offsets = np.zeros(1 if n else 0, dtype=np.intp)
+
+    def col(name):
+        values = df[name].to_numpy(dtype=np.float64)
+        return values if order is None else values[order]
+
+    if scenario == 1:
+        minimum, maximum = col('Minimum'), col('Maximum')
+        midpoint = (minimum + maximum) / 2
+        spread = ((maximum - minimum) / midpoint) * 100
+    else:
+        spread = col('Spread %')
+        if scenario == 2:
+            # Sama dengan np.linspace per struktur: position * step + lowest, titik akhir = highest
+            sizes = np.diff(np.append(offsets, n))
+            row_size = np.repeat(sizes, sizes)
+            position = np.arange(n) - np.repeat(offsets, sizes)
+            lo, hi = params['lowest_midpoint'], params['highest_midpoint']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                midpoint = position * ((hi - lo) / (row_size - 1)) + lo
+            midpoint = np.where(position == row_size - 1, hi, midpoint)
+            midpoint = np.where(row_size == 1, lo, midpoint)
+        elif scenario == 3:
+            # Perkalian berurutan seperti calculate_midpoint_progression, di-reset per struktur
+            factors = 1 + col('Midpoint Differential %') / 100
+            factors[offsets] = np.broadcast_to(params['lowest_midpoint'], n)[offsets]
+            if len(offsets) <= 1:
+                midpoint = np.cumprod(factors)
+            else:
+                midpoint = pd.Series(factors).groupby(structure_index).cumprod().to_numpy()
+        elif scenario == 4:
+            midpoint = col('Midpoint')
+        elif scenario == 5:
+            midpoint = _market_midpoint(df, params, order)
+        else:
+            raise ValueError(f"Skenario tidak dikenal: {scenario}")
+        minimum = midpoint * (1 - spread / 200)
+        maximum = midpoint * (1 + spread / 200)
+
+    codes = None
+    if with_grades and 'Salary Grade' in df.columns:
+        grades = df['Salary Grade'].to_numpy()
+        codes, grade_names = encode_grades(grades if order is None else grades[order], grade_names)
+    return SalaryStructure(minimum, midpoint, maximum, spread, codes, grade_names, offsets)
+
+
+@perf.timed()
 def calculate_scenario_1(df_input):
-    df = df_input.copy()
-    df['Midpoint'] = (df['Minimum'] + df['Maximum']) / 2
-    df['Spread %'] = ((df['Maximum'] - df['Minimum']) / df['Midpoint']) * 100
-    df['Range'] = df['Maximum'] - df['Minimum']
-    df['Mid Point Differential %'] = df['Midpoint'].pct_change() * 100
-    df['Overlap %'] = calculate_overlap(df['Minimum'], df['Maximum'])
-    return df
+    structure = _build_structure(df_input, 1, {}, with_grades=False)
+    return structure.to_frame(base=df_input, columns=SCENARIO_OUTPUTS[1])
 
+@perf.timed()
 def calculate_scenario_2(df_input, lowest_midpoint, highest_midpoint):
-    df = df_input.copy()
-    n = len(df)
-    df['Midpoint'] = np.linspace(lowest_midpoint, highest_midpoint, n)
-    df['Minimum'] = df['Midpoint'] * (1 - df['Spread %'] / 200)
-    df['Maximum'] = df['Midpoint'] * (1 + df['Spread %'] / 200)
-    df['Range'] = df['Maximum'] - df['Minimum']
-    df['Mid Point Differential %'] = df['Midpoint'].pct_change() * 100
-    df['Overlap %'] = calculate_overlap(df['Minimum'], df['Maximum'])
-    return df
+    params = {'lowest_midpoint': lowest_midpoint, 'highest_midpoint': highest_midpoint}
+    structure = _build_structure(df_input, 2, params, with_grades=False)
+    return structure.to_frame(base=df_input, columns=SCENARIO_OUTPUTS[2])
 
+@perf.timed()
 def calculate_scenario_3(df_input, lowest_midpoint):
-    df = df_input.copy()
-    midpoints = [lowest_midpoint]
-    for i in range(1, len(df)):
-        next_mid = midpoints[-1] * (1 + df.iloc[i]['Midpoint Differential %'] / 100)
-        midpoints.append(next_mid)
-    df['Midpoint'] = midpoints
-    df['Minimum'] = df['Midpoint'] * (1 - df['Spread %'] / 200)
-    df['Maximum'] = df['Midpoint'] * (1 + df['Spread %'] / 200)
-    df['Range'] = df['Maximum'] - df['Minimum']
-    df['Overlap %'] = calculate_overlap(df['Minimum'], df['Maximum'])
-    return df
+    structure = _build_structure(df_input, 3, {'lowest_midpoint': lowest_midpoint}, with_grades=False)
+    return structure.to_frame(base=df_input, columns=SCENARIO_OUTPUTS[3])
 
+@perf.timed()
 def calculate_scenario_4(df_input):
-    df = df_input.copy()
-    df['Minimum'] = df['Midpoint'] * (1 - df['Spread %'] / 200)
-    df['Maximum'] = df['Midpoint'] * (1 + df['Spread %'] / 200)
-    df['Range'] = df['Maximum'] - df['Minimum']
-    df['Mid Point Differential %'] = df['Midpoint'].pct_change() * 100
-    df['Overlap %'] = calculate_overlap(df['Minimum'], df['Maximum'])
-    return df
+    structure = _build_structure(df_input, 4, {}, with_grades=False)
+    return structure.to_frame(base=df_input, columns=SCENARIO_OUTPUTS[4])
+
+@perf.timed()
+def calculate_scenario_5(df_input, target_percentile, market_data=None):
+    params = {'target_percentile': target_percentile, 'market_data': market_data}
+    structure = _build_structure(df_input, 5, params,
+                                 with_grades=False)
+    return structure.to_frame(base=df_input, columns=SCENARIO_OUTPUTS[5])
+
+SCENARIO_FUNCTIONS = {
+    1: calculate_scenario_1,
+    2: calculate_scenario_2,
+    3: calculate_scenario_3,
+    4: calculate_scenario_4,
+    5: calculate_scenario_5,
+}
+
+
+def calculate_scenario(df_input, scenario, **params):
+    if scenario not in SCENARIO_FUNCTIONS:
+        raise ValueError(f"Skenario tidak dikenal: {scenario}")
+    return SCENARIO_FUNCTIONS[scenario](df_input, **params)
+
+def calculate_scenario_chunks(chunks, scenario, n_rows=None, **params):
+    # Satu struktur yang datang per chunk (file besar tanpa Structure ID), hasil di-yield per
+    # chunk. Baris terakhir chunk sebelumnya dibawa sebagai konteks, jadi Overlap %, Mid Point
+    # Differential % dan midpoint berantai skenario 3 identik dengan calculate_scenario pada
+    # seluruh tabel. Skenario 2 butuh n_rows (jumlah baris total) untuk posisi linspace.
+    if scenario not in SCENARIO_FUNCTIONS:
+        raise ValueError(f"Skenario tidak dikenal: {scenario}")
+    if scenario == 2 and n_rows is None:
+        raise ValueError("Skenario 2 per chunk membutuhkan n_rows")
+    previous = None
+    start = 0
+    for chunk in chunks:
+        n = len(chunk)
+        if scenario in (2, 3):
+            spread = chunk['Spread %'].to_numpy(dtype=np.float64)
+            if scenario == 2:
+                lo, hi = params['lowest_midpoint'], params['highest_midpoint']
+                position = start + np.arange(n)
+                if n_rows == 1:
+                    midpoint = np.full(n, lo, dtype=np.float64)
+                else:
+                    midpoint = np.where(position == n_rows - 1, hi, position * ((hi - lo) / (n_rows - 1)) + lo)
+            else:
+                factors = 1 + chunk['Midpoint Differential %'].to_numpy(dtype=np.float64) / 100
+                if n:
+                    # Perkalian berurutan dilanjutkan dari midpoint terakhir chunk sebelumnya
+                    factors[0] = params['lowest_midpoint'] if previous is None else previous[1][0] * factors[0]
+                midpoint = np.cumprod(factors)
+            arrays = [midpoint * (1 - spread / 200), midpoint, midpoint * (1 + spread / 200), spread]
+        else:
+            built = _build_structure(chunk, scenario, params, with_grades=False)
+            arrays = [built.minimum, built.midpoint, built.maximum, built.spread]
+        skip = 0
+        if previous is not None:
+            arrays = [np.concatenate([p, a]) for p, a in zip(previous, arrays)]
+            skip = 1
+        values = SalaryStructure(*arrays).columns()
+        yield _merge_frame(chunk, {name: values[name][skip:] for name in SCENARIO_OUTPUTS[scenario]})
+        if n:
+            previous = [a[-1:] for a in arrays]
+        start += n
+
 
-def calculate_scenario_5(df_input, target_percentile):
-    df = df_input.copy()
-    if target_percentile in PERCENTILE_FACTORS:
-        adjustment_factor = PERCENTILE_FACTORS[target_percentile]
+# ====================== FUNGSI BATCH ======================
+def _percentile_factor(target_percentile):
+    # Versi array dari lookup PERCENTILE_FACTORS. Persentil di antara anchor diinterpolasi linear
+    # (P30 di antara P25 dan P50), di luar P10-P95 diekstrapolasi dengan kemiringan segmen ujung,
+    # sehingga faktor selalu naik seiring persentil.
+    pct = np.asarray(target_percentile, dtype=float)
+    anchors = np.array(sorted(PERCENTILE_FACTORS), dtype=float)
+    factors = np.array([PERCENTILE_FACTORS[p] for p in sorted(PERCENTILE_FACTORS)])
+    factor = np.interp(pct, anchors, factors)
+    low_slope = (factors[1] - factors[0]) / (anchors[1] - anchors[0])
+    high_slope = (factors[-1] - factors[-2]) / (anchors[-1] - anchors[-2])
+    factor = np.where(pct < anchors[0], factors[0] + (pct - anchors[0]) * low_slope, factor)
+    factor = np.where(pct > anchors[-1], factors[-1] + (pct - anchors[-1]) * high_slope, factor)
+    for p, f in PERCENTILE_FACTORS.items():
+        factor = np.where(pct == p, f, factor)
+    return factor
+
+
+def _market_midpoint(df, params, rows=None):
+    # Tanpa market_data: Market Rate * faktor PERCENTILE_FACTORS. Dengan market_data (distribusi
+    # survei per grade, lihat market.py): persentil target dihitung langsung dari sampel survei.
+    market_data = params.get('market_data')
+    if market_data is not None:
+        grades = df['Salary Grade'].to_numpy()
+        return market_data.rates(grades if rows is None else grades[rows], params['target_percentile'])
+    rates = df['Market Rate'].to_numpy(dtype=np.float64)
+    return (rates if rows is None else rates[rows]) * _percentile_factor(params['target_percentile'])
+
+
+def _structure_param(value, structure_ids, name):
+    # Parameter per struktur: skalar, dict/Series per Structure ID, atau array sejajar structure_ids
+    if isinstance(value, dict):
+        missing = [s for s in structure_ids if s not in value]
+        if missing:
+            raise ValueError(f"{name}: tidak ada nilai untuk struktur {missing[:5]}")
+        return np.array([value[s] for s in structure_ids], dtype=float)
+    if isinstance(value, pd.Series):
+        out = value.reindex(structure_ids).to_numpy(dtype=float)
+        if np.isnan(out).any():
+            raise ValueError(f"{name}: tidak ada nilai untuk sebagian struktur")
+        return out
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full(len(structure_ids), float(arr))
+    if arr.shape != (len(structure_ids),):
+        raise ValueError(f"{name}: butuh {len(structure_ids)} nilai (satu per struktur), dapat {arr.shape}")
+    return arr
+
+
+def _batch_structure(df_input, scenario, structure_col, grade_names, with_grades, params):
+    codes, structure_ids = pd.factorize(df_input[structure_col], sort=False)
+    if (codes < 0).any():
+        # Kode -1 akan mengambil parameter struktur terakhir lewat indexing negatif
+        raise ValueError(f"{structure_col} kosong pada {int((codes < 0).sum())} baris")
+    order = None
+    if len(codes) > 1 and (codes[1:] < codes[:-1]).any():
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+    offsets = np.flatnonzero(np.append(True, codes[1:] != codes[:-1])) if len(codes) else np.zeros(0, dtype=np.intp)
+    row_params = {name: value if name == 'market_data' else _structure_param(value, structure_ids, name)[codes]
+                  for name, value in params.items()}
+    structure = _build_structure(df_input, scenario, row_params, offsets=offsets, order=order,
+                                 structure_index=codes, grade_names=grade_names, with_grades=with_grades)
+    return structure, order
+
+
+def calculate_structure(df_input, scenario, structure_col=None, grade_names=None, with_grades=True, **params):
+    # Seperti calculate_scenario/calculate_batch tetapi mengembalikan SalaryStructure tanpa DataFrame.
+    # Dengan structure_col, baris dikelompokkan per struktur (urutan kemunculan pertama).
+    # with_grades=False melewatkan encoding nama grade jika hanya angka yang dibutuhkan.
+    if structure_col is None:
+        return _build_structure(df_input, scenario, params, grade_names=grade_names, with_grades=with_grades)
+    return _batch_structure(df_input, scenario, structure_col, grade_names, with_grades, params)[0]
+
+
+@perf.timed()
+def calculate_batch(df_input, scenario, structure_col=STRUCTURE_ID_COLUMN, **params):
+    # Hitung banyak struktur sekaligus dari tabel long-format dengan kolom structure_col.
+    # Parameter skenario boleh skalar (sama untuk semua struktur), dict/Series per
+    # Structure ID, atau array dengan satu nilai per struktur (urutan kemunculan).
+    # Overlap dan Mid Point Differential % di-reset di setiap awal struktur.
+    structure, order = _batch_structure(df_input, scenario, structure_col, None, False, params)
+    values = structure.columns()
+    columns = [name for name in BATCH_OUTPUTS if not (scenario == 3 and name == 'Mid Point Differential %')]
+    if order is None:
+        return _merge_frame(df_input, {name: values[name] for name in columns})
+    inverse = np.empty(len(order), dtype=np.intp)
+    inverse[order] = np.arange(len(order))
+    return _merge_frame(df_input, {name: values[name][inverse] for name in columns})
+
+
+# ====================== PERHITUNGAN INKREMENTAL ======================
+def changed_rows(old_df, new_df):
+    # Posisi baris yang berbeda antara dua input. None jika jumlah baris/kolom berubah
+    # (baris ditambah/dihapus di data_editor), yang berarti harus dihitung ulang penuh.
+    if old_df is None or len(old_df) != len(new_df) or list(old_df.columns) != list(new_df.columns):
+        return None
+    changed = np.zeros(len(new_df), dtype=bool)
+    for col in new_df.columns:
+        a, b = old_df[col].to_numpy(), new_df[col].to_numpy()
+        same = a == b
+        if not same.all():
+            same |= pd.isna(a) & pd.isna(b)
+        changed |= ~same
+    return np.flatnonzero(changed)
+
+
+def _overlap_at(mins, maxs, idx):
+    # Rumus yang sama dengan calculate_overlap, hanya untuk posisi idx (idx >= 1)
+    prev_min, prev_max, curr_min = mins[idx - 1], maxs[idx - 1], mins[idx]
+    prev_range = prev_max - prev_min
+    valid = (prev_max > curr_min) & (prev_range > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, (prev_max - curr_min) / prev_range * 100, 0.0)
+
+
+@perf.timed()
+def recalculate(previous_result, df_input, scenario, rows=None, previous_input=None, **params):
+    # Hitung ulang hanya bagian yang bergantung pada baris yang berubah: min/mid/max baris itu,
+    # lalu differential dan overlap baris itu dan baris sesudahnya. Di skenario 3 seluruh ekor
+    # rantai midpoint sejak baris pertama yang berubah ikut dihitung ulang.
+    # params harus sama dengan perhitungan sebelumnya; hasilnya identik dengan hitung ulang penuh.
+    if rows is None:
+        rows = changed_rows(previous_input, df_input)
+    if rows is None or previous_result is None or len(previous_result) != len(df_input):
+        return calculate_scenario(df_input, scenario, **params)
+    rows = np.unique(np.asarray(rows, dtype=np.intp))
+    n = len(df_input)
+    outputs = SCENARIO_OUTPUTS[scenario]
+    merged = {col: df_input[col] for col in df_input.columns if col not in outputs}
+    if len(rows) == 0:
+        return _merge_frame(previous_result, merged)
+
+    prev = {name: previous_result[name].to_numpy(dtype=np.float64, copy=True)
+            for name in ['Minimum', 'Midpoint', 'Maximum', 'Spread %']
+            if name in previous_result.columns}
+
+    def col(name, idx):
+        return df_input[name].to_numpy(dtype=np.float64)[idx]
+
+    if scenario == 3:
+        rows = np.arange(rows[0], n)
+    if scenario == 1:
+        minimum, maximum = col('Minimum', rows), col('Maximum', rows)
+        midpoint = (minimum + maximum) / 2
+        spread = ((maximum - minimum) / midpoint) * 100
     else:
-        adjustment_factor = 1 + (target_percentile - 50) / 100
-    df['Midpoint'] = df['Market Rate'] * adjustment_factor
-    df['Minimum'] = df['Midpoint'] * (1 - df['Spread %'] / 200)
-    df['Maximum'] = df['Midpoint'] * (1 + df['Spread %'] / 200)
-    df['Range'] = df['Maximum'] - df['Minimum']
-    df['Mid Point Differential %'] = df['Midpoint'].pct_change() * 100
-    df['Overlap %'] = calculate_overlap(df['Minimum'], df['Maximum'])
-    return df
\ No newline at end of file
+        spread = col('Spread %', rows)
+        if scenario == 2:
+            midpoint = prev['Midpoint'][rows]
+        elif scenario == 3:
+            start = rows[0]
+            factors = 1 + col('Midpoint Differential %', rows) / 100
+            factors[0] = params['lowest_midpoint'] if start == 0 else prev['Midpoint'][start - 1] * factors[0]
+            midpoint = np.cumprod(factors)
+        elif scenario == 4:
+            midpoint = col('Midpoint', rows)
+        elif scenario == 5:
+            midpoint = _market_midpoint(df_input, params, rows)
+        else:
+            raise ValueError(f"Skenario tidak dikenal: {scenario}")
+        minimum = midpoint * (1 - spread / 200)
+        maximum = midpoint * (1 + spread / 200)
+
+    mins, mids, maxs = prev['Minimum'], prev['Midpoint'], prev['Maximum']
+    mins[rows], mids[rows], maxs[rows] = minimum, midpoint, maximum
+    values = {'Minimum': mins, 'Midpoint': mids, 'Maximum': maxs}
+    if 'Spread %' in outputs:
+        values['Spread %'] = prev['Spread %']
+        values['Spread %'][rows] = spread
+    values['Range'] = previous_result['Range'].to_numpy(dtype=np.float64, copy=True)
+    values['Range'][rows] = maximum - minimum
+
+    # Baris yang bergantung pada baris sebelumnya: baris yang berubah dan baris sesudahnya
+    dependent = np.union1d(rows, rows + 1)
+    dependent = dependent[(dependent > 0) & (dependent < n)]
+    values['Overlap %'] = previous_result['Overlap %'].to_numpy(dtype=np.float64, copy=True)
+    values['Overlap %'][dependent] = _overlap_at(mins, maxs, dependent)
+    if 'Mid Point Differential %' in outputs:
+        diff = previous_result['Mid Point Differential %'].to_numpy(dtype=np.float64, copy=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diff[dependent] = (mids[dependent] / mids[dependent - 1] - 1) * 100
+        values['Mid Point Differential %'] = diff
+
+    merged.update((name, values[name]) for name in outputs)
+    return _merge_frame(previous_result, merged)